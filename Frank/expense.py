@@ -1,8 +1,16 @@
 import csv
 import os
-from collections import defaultdict
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import ledger
 
 CSV_FILE = "expenses.csv"
+STORAGE = "csv"  # "csv", "columnar" or "sqlite", see ledger/storage.py
+BATCH_FLUSH_SIZE = 1000  # Rows per write when saving a batch entry
+VIEW_PAGE_SIZE = 20  # Rows per page in view_expenses
+TOP_SHOWN = 5  # Rows listed by show_most_expensive
 
 if not os.path.exists(CSV_FILE):
     with open(CSV_FILE, mode="w", newline="") as file:
@@ -14,43 +22,27 @@ def add_expense():
     category = input("Enter the category (e.g., Food, Transport): ")
     amount = input("Enter the amount spent: ")
 
-    with open(CSV_FILE, mode="a", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow([date, category, amount])
+    ledger.append_expense(CSV_FILE, [date, category, amount], STORAGE)
     
     print("✅ Expense added successfully!\n")
 
-def view_expenses():
+def view_expenses(start="", end=""):
     try:
-        with open(CSV_FILE, mode="r") as file:
-            reader = csv.reader(file)
-            next(reader)
-            expenses = list(reader)
-
-            if not expenses:
-                print("No expenses recorded yet.")
-                return
-
-            print("\n📌 Your Expenses:")
-            print("-" * 30)
-            for i, row in enumerate(expenses, start=1):
-                print(f"{i}. {row[0]} | {row[1]} | ${row[2]}")
-            print("-" * 30)
+        shown = ledger.browse(CSV_FILE, lambda i, row: f"{i}. {row[0]} | {row[1]} | ${row[2]}",
+                              "\n📌 Your Expenses:\n" + "-" * 30, "-" * 30, STORAGE, VIEW_PAGE_SIZE,
+                              start, end)
+        if not shown:
+            print("No expenses in that date range." if start or end else "No expenses recorded yet.")
     except FileNotFoundError:
         print("No expenses found. Add some first!")
 
 def delete_expense():
     view_expenses()
     try:
-        index = int(input("Enter the number of the expense to delete: ")) - 1
-        with open(CSV_FILE, mode="r") as file:
-            reader = list(csv.reader(file))
-        
-        if 0 <= index < len(reader) - 1:
-            del reader[index + 1]
-            with open(CSV_FILE, mode="w", newline="") as file:
-                writer = csv.writer(file)
-                writer.writerows(reader)
+        number = int(input("Enter the number of the expense to delete: "))
+        removed = ledger.delete_row(CSV_FILE, number, STORAGE)
+
+        if removed is not None:
             print("✅ Expense deleted successfully!\n")
         else:
             print("❌ Invalid selection.")
@@ -59,52 +51,81 @@ def delete_expense():
 
 def show_most_expensive():
     try:
-        with open(CSV_FILE, mode="r") as file:
-            reader = csv.reader(file)
-            next(reader)
-            expenses = list(reader)
+        ranked = ledger.top_expenses(CSV_FILE, TOP_SHOWN, storage=STORAGE)
 
-            if not expenses:
-                print("No expenses recorded yet.")
-                return
+        if not ranked:
+            print("No expenses recorded yet.")
+            return
 
-            most_expensive = max(expenses, key=lambda x: float(x[2]))
-            print(f"\n💰 Most Expensive Expense: {most_expensive[0]} | {most_expensive[1]} | ${most_expensive[2]}\n")
+        print(f"\n💰 Top {len(ranked)} Most Expensive Expenses:")
+        print("-" * 30)
+        for rank, expense in enumerate(ranked, start=1):
+            print(f"{rank}. {expense[0]} | {expense[1]} | ${expense[2]}")
+        print("-" * 30)
     except FileNotFoundError:
         print("No expenses found.")
 
-def show_total_by_category():
+def show_total_by_category(start="", end=""):
     try:
-        with open(CSV_FILE, mode="r") as file:
-            reader = csv.reader(file)
-            next(reader)
-            expenses = list(reader)
+        summary = ledger.summarize_between(CSV_FILE, start, end, STORAGE)
 
-            if not expenses:
+        if not summary.count:
+            if not (start or end):
                 print("No expenses recorded yet.")
-                return
-
-            category_totals = defaultdict(float)
-            for row in expenses:
-                category_totals[row[1]] += float(row[2])
+            return
 
-            print("\n📊 Total Expenses by Category:")
-            print("-" * 30)
-            for category, total in category_totals.items():
-                print(f"{category}: ${total:.2f}")
-            print("-" * 30)
+        print("\n📊 Total Expenses by Category:")
+        print("-" * 30)
+        for category, total in summary.by_category.items():
+            print(f"{category}: ${total / 100:.2f}")
+        print("-" * 30)
     except FileNotFoundError:
         print("No expenses found.")
 
+def batch_add_expenses():
+    print("\n📥 Batch Entry: one expense per line as YYYY-MM-DD,Category,Amount")
+    print("Leave the line empty to save them all.")
+    rows = []
+    while True:
+        line = input(f"{len(rows) + 1}> ").strip()
+        if not line:
+            break
+        row = [part.strip() for part in line.split(",")]
+        problem = ledger.check_expense(row)
+        if problem:
+            print(f"❌ Invalid line: {problem}.")
+            continue
+        rows.append(row)
+
+    if not rows:
+        print("No expenses entered.")
+        return
+
+    start = time.perf_counter()
+    added = ledger.append_expenses(CSV_FILE, rows, BATCH_FLUSH_SIZE, STORAGE)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"✅ Added {added} expense(s) in {elapsed:.3f}s ({added / elapsed:,.0f} rows/sec)\n")
+
+def view_date_range():
+    start = input("From date (YYYY-MM-DD, empty for the first expense): ").strip()
+    end = input("To date (YYYY-MM-DD, empty for the last expense): ").strip()
+    if any(date and not ledger.validate_date(date) for date in (start, end)):
+        print("❌ Invalid date format. Please use YYYY-MM-DD.")
+        return
+    view_expenses(start, end)
+    show_total_by_category(start, end)
+
 def main():
     while True:
         print("\n📊 Expense Tracker")
         print("1️⃣ Add Expense")
         print("2️⃣ View Expenses")
         print("3️⃣ Delete Expense")
-        print("4️⃣ Show Most Expensive Expense")
+        print("4️⃣ Show Most Expensive Expenses")
         print("5️⃣ Show Total Expenses by Category")
-        print("6️⃣ Exit")
+        print("6️⃣ Batch Add Expenses")
+        print("7️⃣ View Expenses by Date Range")
+        print("8️⃣ Exit")
 
         choice = input("Choose an option: ")
 
@@ -119,6 +140,10 @@ def main():
         elif choice == "5":
             show_total_by_category()
         elif choice == "6":
+            batch_add_expenses()
+        elif choice == "7":
+            view_date_range()
+        elif choice == "8":
             print("👋 See you!")
             break
         else:
@@ -0,0 +1,38 @@
+"""Microbenchmark: summing amounts as integer cents against float().
+
+Run from the repository root:
+
+    python -m benchmarks.bench_amounts
+"""
+
+import array
+import random
+import timeit
+
+from ledger.amounts import parse_cents
+
+def main():
+    random.seed(0)
+    count = 1_000_000
+    texts = [random.choice((str(random.randint(1, 99999)), f"{random.randint(1, 99999) / 100}"))
+             for _ in range(count)]
+
+    def floats():
+        return sum(map(float, texts))
+
+    def cents():
+        return sum(map(parse_cents, texts))
+
+    stored = array.array("q", map(parse_cents, texts))
+
+    def stored_cents():
+        return sum(stored)
+
+    print(f"float sum: {floats():.2f}")
+    print(f"cents sum: {cents() / 100:.2f} (exact: {cents()} cents)")
+    for name, func in (("float()", floats), ("parse_cents()", cents), ("int64 column", stored_cents)):
+        seconds = min(timeit.repeat(func, number=1, repeat=3))
+        print(f"  {name:<14} {seconds:.3f}s  {count / seconds:>14,.0f} amounts/sec")
+
+if __name__ == "__main__":
+    main()
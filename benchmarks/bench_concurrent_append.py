@@ -0,0 +1,82 @@
+"""Stress benchmark: many processes appending to one CSV ledger at once.
+
+Every writer appends its own numbered rows, one append_expense() call or
+one append_expenses() batch at a time. Afterwards the file is checked for
+lost, duplicated or torn rows, and the running totals against a rescan.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_concurrent_append [--writers 8] [--rows 2000] [--batch 1]
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import tempfile
+import time
+
+from ledger import aggregate, append_expense, append_expenses, summarize
+from ledger.reader import iter_expenses
+
+def _writer(path, writer_id, rows, batch, start):
+    start.wait()
+    for first in range(0, rows, batch):
+        chunk = [["2024-01-01", f"W{writer_id}", f"{writer_id + 1}.{number % 100:02d}"]
+                 for number in range(first, min(first + batch, rows))]
+        if batch == 1:
+            append_expense(path, chunk[0])
+        else:
+            append_expenses(path, chunk)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=2000, help="rows per writer")
+    parser.add_argument("--batch", type=int, default=1, help="rows per append call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "expenses.csv")
+        with open(path, mode="w", newline="") as file:
+            csv.writer(file).writerow(["Date", "Category", "Amount"])
+        summarize(path)  # Start with running totals, as the trackers do
+
+        start = multiprocessing.Event()
+        writers = [multiprocessing.Process(target=_writer, args=(path, i, args.rows, args.batch, start))
+                   for i in range(args.writers)]
+        for process in writers:
+            process.start()
+        began = time.perf_counter()
+        start.set()
+        for process in writers:
+            process.join()
+        elapsed = time.perf_counter() - began
+
+        expected = args.writers * args.rows
+        counts = {}
+        torn = 0
+        with open(path, mode="r", newline="") as file:
+            reader = csv.reader(file)
+            next(reader)
+            for row in reader:
+                if len(row) != 3 or not row[1].startswith("W"):
+                    torn += 1
+                    continue
+                counts[row[1]] = counts.get(row[1], 0) + 1
+        lost = sum(max(args.rows - counts.get(f"W{i}", 0), 0) for i in range(args.writers))
+
+        summary = summarize(path)
+        aggregate._summaries.clear()
+        rescanned = sum(1 for _ in iter_expenses(path))
+
+        print(f"{args.writers} writers x {args.rows} rows, {args.batch} per call: "
+              f"{elapsed:.2f}s, {expected / elapsed:,.0f} rows/sec")
+        print(f"  rows on disk: {sum(counts.values()):,} of {expected:,}, lost {lost}, torn {torn}")
+        print(f"  running totals: {summary.count:,} rows, rescan: {rescanned:,} rows")
+        ok = not lost and not torn and summary.count == rescanned == expected
+        print("  OK" if ok else "  FAILED")
+        return 0 if ok else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,52 @@
+"""Microbenchmark: ledger.dates.parse_day against datetime.strptime.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_dates
+"""
+
+import random
+import timeit
+from datetime import datetime
+
+from ledger import dates
+
+def sample_dates(count, distinct):
+    """Returns count dates drawn from distinct values, half of them non-padded."""
+    random.seed(0)
+    pool = []
+    for _ in range(distinct):
+        year, month, day = random.randint(2000, 2030), random.randint(1, 12), random.randint(1, 28)
+        if random.random() < 0.5:
+            pool.append(f"{year}-{month}-{day}")
+        else:
+            pool.append(f"{year}-{month:02d}-{day:02d}")
+    return [random.choice(pool) for _ in range(count)]
+
+def main():
+    count = 200_000
+    for distinct in (365, count):
+        texts = sample_dates(count, distinct)
+
+        def strptime():
+            for text in texts:
+                datetime.strptime(text, "%Y-%m-%d").toordinal()
+
+        def parse_cold():
+            dates._memo.clear()
+            for text in texts:
+                dates._parse(text)
+
+        def parse_day():
+            dates._memo.clear()
+            dates.parse_days(texts)
+
+        print(f"{count:,} dates, {distinct:,} distinct:")
+        base = None
+        for name, func in (("strptime", strptime), ("parse (no memo)", parse_cold), ("parse_days", parse_day)):
+            seconds = min(timeit.repeat(func, number=1, repeat=3))
+            base = base or seconds
+            print(f"  {name:<16} {seconds:.3f}s  {count / seconds:>12,.0f} dates/sec  x{base / seconds:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark: memory per row of a ledger held in memory.
+
+Builds a CSV ledger, then loads every row in a fresh process, once as a
+list of (row id, Expense) tuples of str, as the readers yield them, and
+once as an ExpenseTable (ledger/table.py). Reports the growth of the
+process's peak RSS per row and the load time.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_memory [--rows 10000000]
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_storage import _write_ledger
+from ledger.reader import iter_rows
+from ledger.table import ExpenseTable
+
+def _peak_kib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def load(path, kind):
+    """Loads the ledger as kind ("rows" or "table"); prints rows, bytes and seconds."""
+    before = _peak_kib()
+    start = time.perf_counter()
+    loaded = list(iter_rows(path)) if kind == "rows" else ExpenseTable(iter_rows(path))
+    seconds = time.perf_counter() - start
+    print(len(loaded), (_peak_kib() - before) * 1024, seconds)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="ledger size (default: %(default)s)")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "expenses.csv")
+        _write_ledger(path, args.rows)
+        print(f"{args.rows:,} rows")
+        print(f"  {'in memory as':<28} {'bytes/row':>10} {'total':>10} {'load':>8}")
+        for kind, label in (("rows", "list of (row id, Expense)"), ("table", "ExpenseTable")):
+            output = subprocess.run(
+                [sys.executable, "-c", f"from benchmarks.bench_memory import load; load({path!r}, {kind!r})"],
+                capture_output=True, text=True, check=True).stdout
+            rows, size, seconds = output.split()
+            print(f"  {label:<28} {int(size) / int(rows):>10.1f} {int(size) / 2**20:>8.0f}MB {float(seconds):>7.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Load generator: request latency of the JSON-lines server (ledger/server.py).
+
+Starts `python -m ledger serve` on a fresh ledger, seeded with --seed
+rows, then runs --clients concurrent clients. Each one sends --requests
+requests, one at a time, waiting for each reply: mostly totals, some
+appends and some one-page listings, in the mix given by --mix. Prints p50
+and p99 latency per operation and overall, and the total throughput.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_server [--clients 50] [--requests 200] [--seed 100000]
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CATEGORIES = ("Food", "Transport", "Rent", "Fun", "Health", "Books", "Gifts", "Travel")
+
+def _write_ledger(path, rows):
+    random.seed(rows)
+    with open(path, mode="w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Date", "Category", "Amount"])
+        for _ in range(rows):
+            writer.writerow([f"2024-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}",
+                             random.choice(CATEGORIES), f"{random.randint(1, 50000) / 100:.2f}"])
+
+def _request(op, client, number):
+    if op == "add":
+        return {"op": "add", "date": f"2024-{number % 12 + 1:02d}-15",
+                "category": CATEGORIES[client % len(CATEGORIES)], "amount": f"{number % 500 + 1}.25"}
+    if op == "list":
+        return {"op": "list", "offset": number * 20, "limit": 20}
+    return {"op": "aggregate"}
+
+async def _client(socket_path, client, requests, ops, latencies):
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    try:
+        for number in range(requests):
+            op = ops[(client + number) % len(ops)]
+            line = json.dumps({"id": number, **_request(op, client, number)}).encode() + b"\n"
+            start = time.perf_counter()
+            writer.write(line)
+            reply = json.loads(await reader.readline())
+            latencies[op].append(time.perf_counter() - start)
+            if not reply["ok"]:
+                raise RuntimeError(f"{op} failed: {reply['error']}")
+    finally:
+        writer.close()
+
+async def _load(socket_path, clients, requests, ops):
+    latencies = {op: [] for op in set(ops)}
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(socket_path, client, requests, ops, latencies)
+                           for client in range(clients)))
+    return time.perf_counter() - start, latencies
+
+def _percentiles(seconds):
+    cuts = statistics.quantiles(seconds, n=100, method="inclusive")
+    return cuts[49] * 1000, cuts[98] * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50, help="concurrent clients (default: %(default)s)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per client (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=100_000, help="rows in the ledger to start with")
+    parser.add_argument("--mix", default="aggregate=7,add=2,list=1",
+                        help="relative weight of each operation (default: %(default)s)")
+    args = parser.parse_args()
+    ops = [op for op, weight in (part.split("=") for part in args.mix.split(",")) for _ in range(int(weight))]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "expenses.csv")
+        socket_path = os.path.join(directory, "ledger.sock")
+        _write_ledger(path, args.seed)
+        server = subprocess.Popen([sys.executable, "-m", "ledger", "serve", path, "--socket", socket_path],
+                                  stdout=subprocess.DEVNULL)
+        try:
+            while not os.path.exists(socket_path):
+                if server.poll() is not None:
+                    sys.exit("❌ The server exited before listening")
+                time.sleep(0.01)
+            asyncio.run(_load(socket_path, 1, 1, ["aggregate"]))  # First totals build the running totals
+            elapsed, latencies = asyncio.run(_load(socket_path, args.clients, args.requests, ops))
+        finally:
+            server.terminate()
+            server.wait()
+
+    done = sum(len(seconds) for seconds in latencies.values())
+    print(f"{done:,} requests from {args.clients} clients in {elapsed:.2f}s ({done / elapsed:,.0f} req/s)")
+    print(f"  {'operation':<10} {'count':>8} {'p50':>9} {'p99':>9}")
+    for op, seconds in sorted(latencies.items()):
+        p50, p99 = _percentiles(seconds)
+        print(f"  {op:<10} {len(seconds):>8,} {p50:>7.2f}ms {p99:>7.2f}ms")
+    p50, p99 = _percentiles([second for seconds in latencies.values() for second in seconds])
+    print(f"  {'all':<10} {done:>8,} {p50:>7.2f}ms {p99:>7.2f}ms")
+
+if __name__ == "__main__":
+    main()
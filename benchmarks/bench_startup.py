@@ -0,0 +1,71 @@
+"""Benchmark: cold start of placide's tracker, from launch to the menu.
+
+Runs placide/proj.py in an empty directory, answers the menu with Exit,
+and times the whole process several times. The median has to stay under
+BUDGET_MS; the run then lists the slowest imports, as reported by
+python -X importtime, so a regression points at its cause. Exits with
+status 1 when over budget.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup [--runs 10] [--budget 150]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "placide", "proj.py")
+EXIT_CHOICE = "8\n"
+# Launch to menu and back, in milliseconds; the interpreter alone takes ~20
+BUDGET_MS = 150
+
+def _start(directory, *options):
+    return subprocess.run([sys.executable, *options, SCRIPT], cwd=directory, input=EXIT_CHOICE,
+                          capture_output=True, text=True, check=True)
+
+def _timed_start(directory):
+    start = time.perf_counter()
+    _start(directory)
+    return (time.perf_counter() - start) * 1000
+
+def _slowest_imports(directory, count):
+    """Returns [(cumulative microseconds, module)] of the slowest top-level imports."""
+    imports = []
+    for line in _start(directory, "-X", "importtime").stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit() and not module.startswith("  "):
+            imports.append((int(cumulative), module.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="starts to time (default: %(default)s)")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS,
+                        help="median start-up budget in ms (default: %(default)s)")
+    parser.add_argument("--top", type=int, default=8, help="slowest imports to list (default: %(default)s)")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        _start(directory)  # Creates expenses.csv and warms the page cache
+        times = [_timed_start(directory) for _ in range(args.runs)]
+        slowest = _slowest_imports(directory, args.top)
+
+    median = statistics.median(times)
+    print(f"start-up: median {median:.1f} ms, min {min(times):.1f} ms, max {max(times):.1f} ms "
+          f"over {args.runs} runs (budget {args.budget:.0f} ms)")
+    print("slowest imports (cumulative):")
+    for microseconds, module in slowest:
+        print(f"  {microseconds / 1000:>8.1f} ms  {module}")
+    if median > args.budget:
+        print("❌ Over budget")
+        sys.exit(1)
+    print("✅ Within budget")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark: the CSV and SQLite storages on the trackers' menu operations.
+
+For each ledger size, builds a CSV ledger, migrates it to SQLite and times
+totals (with no running totals to start from), a category lookup, a
+filtered delete and a single append on both.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_storage [--sizes 10000,1000000,10000000]
+"""
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+from ledger import aggregate, sqlstore, storage
+from ledger.sidecar import drop_sidecar
+
+CATEGORIES = ("Food", "Transport", "Rent", "Fun", "Health", "Books", "Gifts", "Travel")
+
+def _write_ledger(path, rows):
+    random.seed(rows)
+    with open(path, mode="w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Date", "Category", "Amount"])
+        for _ in range(rows):
+            writer.writerow([f"2024-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}",
+                             random.choice(CATEGORIES), f"{random.randint(1, 50000) / 100:.2f}"])
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def _cold_summary(path):
+    aggregate._summaries.clear()
+    drop_sidecar(path)
+    return storage.summarize(path)
+
+def bench(directory, rows):
+    path = os.path.join(directory, f"expenses{rows}.csv")
+    _write_ledger(path, rows)
+    seconds, store = _timed(lambda: sqlstore.import_csv(path))
+    store.close()
+    print(f"\n{rows:,} rows (migration to SQLite: {seconds:.2f}s)")
+
+    operations = (
+        ("totals", lambda kind: _cold_summary(path) if kind == "csv" else storage.summarize(path, kind)),
+        ("find category", lambda kind: storage.find_expenses(path, category="gifts", storage=kind)),
+        ("delete by date", lambda kind: storage.delete_found(
+            path, storage.find_expenses(path, date="2024-06-15", storage=kind), kind)),
+        ("append one row", lambda kind: storage.append_expense(path, ["2024-07-01", "Food", "9.99"], kind)),
+    )
+    print(f"  {'operation':<16} {'csv':>10} {'sqlite':>10}")
+    for name, operation in operations:
+        times = [_timed(lambda: operation(kind))[0] for kind in ("csv", "sqlite")]
+        print(f"  {name:<16} {times[0]:>9.4f}s {times[1]:>9.4f}s")
+
+    csv_totals = storage.summarize(path)
+    sql_totals = storage.summarize(path, "sqlite")
+    same = (csv_totals.count, csv_totals.total) == (sql_totals.count, sql_totals.total)
+    print(f"  totals agree: {same}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,1000000",
+                        help="comma-separated ledger sizes (default: %(default)s)")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in map(int, args.sizes.split(",")):
+            bench(directory, rows)
+
+if __name__ == "__main__":
+    main()
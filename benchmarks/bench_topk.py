@@ -0,0 +1,77 @@
+"""Benchmark: top-k most expensive expenses, overall, per category and per month.
+
+Builds a CSV ledger and migrates it to SQLite, then times each ranking
+four ways: materializing every row and sorting it (as the trackers used
+to find their maximum), one streaming pass through bounded heaps, the
+heaps kept in the running totals, and SQLite's ORDER BY ... LIMIT. Also
+reports the peak memory of the sort and of the streaming pass.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_topk [--rows 1000000] [-k 10]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_storage import _write_ledger
+from ledger import aggregate, ranking, sqlstore, storage
+from ledger.dates import parse_month
+
+def _sorted(path, k, by):
+    """The ranking the old way: every row in a list, sorted by float(amount)."""
+    rows = list(storage.iter_expenses(path))
+    groups = {}
+    for row in rows:
+        if by == "month":
+            group = "%04d-%02d" % parse_month(row[0])
+        else:
+            group = row[1] if by == "category" else None
+        groups.setdefault(group, []).append(row)
+    return {group: sorted(found, key=lambda row: float(row[2]), reverse=True)[:k]
+            for group, found in groups.items()}
+
+def _streamed(path, k, by):
+    return ranking._stream(storage.iter_expenses(path), k, by, False)
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def _peak(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="ledger size (default: %(default)s)")
+    parser.add_argument("-k", type=int, default=aggregate.RANKED, help="expenses per group (default: %(default)s)")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "expenses.csv")
+        _write_ledger(path, args.rows)
+        sqlstore.import_csv(path).close()
+        storage.summarize(path, rollup=True)  # Builds the running totals and their heaps
+        print(f"{args.rows:,} rows, k={args.k}")
+        print(f"  {'ranking':<10} {'sort':>9} {'stream':>9} {'totals':>9} {'sqlite':>9} "
+              f"{'sort mem':>10} {'stream mem':>11}")
+        for by in (None, "category", "month"):
+            times = [
+                _timed(lambda: _sorted(path, args.k, by)),
+                _timed(lambda: _streamed(path, args.k, by)),
+                _timed(lambda: ranking.top_expenses(path, args.k, by)),
+                _timed(lambda: ranking.top_expenses(path, args.k, by, storage="sqlite")),
+            ]
+            peaks = [_peak(lambda: _sorted(path, args.k, by)), _peak(lambda: _streamed(path, args.k, by))]
+            print(f"  {by or 'overall':<10} " + " ".join(f"{seconds:>8.3f}s" for seconds in times)
+                  + f" {peaks[0] / 2**20:>8.1f}MB {peaks[1] / 2**10:>9.1f}KB")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 import csv
 import os
 
+import ledger
+
 # Define the CSV file name
 CSV_FILE = "expenses.csv"
+STORAGE = "csv"  # "csv", "columnar" or "sqlite", see ledger/storage.py
 
 # Ensure the file exists and has headers
 if not os.path.exists(CSV_FILE):
@@ -16,29 +19,17 @@ def add_expense():
     category = input("Enter the category (e.g., Food, Transport): ")
     amount = input("Enter the amount spent: ")
 
-    with open(CSV_FILE, mode="a", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow([date, category, amount])
+    ledger.append_expense(CSV_FILE, [date, category, amount], STORAGE)
     
     print("✅ Expense added successfully!\n")
 
 def view_expenses():
     """Displays all recorded expenses."""
     try:
-        with open(CSV_FILE, mode="r") as file:
-            reader = csv.reader(file)
-            next(reader)  # Skip header
-            expenses = list(reader)
-
-            if not expenses:
-                print("No expenses recorded yet.")
-                return
-
-            print("\n📌 Your Expenses:")
-            print("-" * 30)
-            for row in expenses:
-                print(f"{row[0]} | {row[1]} | ${row[2]}")
-            print("-" * 30)
+        shown = ledger.browse(CSV_FILE, lambda _, row: f"{row[0]} | {row[1]} | ${row[2]}",
+                              "\n📌 Your Expenses:\n" + "-" * 30, "-" * 30, STORAGE)
+        if not shown:
+            print("No expenses recorded yet.")
 
     except FileNotFoundError:
         print("No expenses found. Add some first!")
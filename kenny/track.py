@@ -1,8 +1,15 @@
 import csv
 import os
-from datetime import datetime
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import ledger
 
 CSV_FILE = "expenses.csv"
+STORAGE = "csv"  # "csv", "columnar" or "sqlite", see ledger/storage.py
+BATCH_FLUSH_SIZE = 1000  # Rows per write when saving a batch entry
+VIEW_PAGE_SIZE = 20  # Rows per page in view_expenses
 
 # Initialize CSV file with headers if it doesn't exist
 if not os.path.exists(CSV_FILE):
@@ -10,24 +17,10 @@ if not os.path.exists(CSV_FILE):
         writer = csv.writer(file)
         writer.writerow(["Date", "Category", "Amount"])
 
-def validate_date(date_str):
-    try:
-        datetime.strptime(date_str, "%Y-%m-%d")
-        return True
-    except ValueError:
-        return False
-
-def validate_amount(amount_str):
-    try:
-        amount = float(amount_str)
-        return amount > 0
-    except ValueError:
-        return False
-
 def add_expense():
     while True:
         date = input("Enter the date (YYYY-MM-DD): ").strip()
-        if not validate_date(date):
+        if not ledger.validate_date(date):
             print("❌ Invalid date format. Please use YYYY-MM-DD.")
             continue
         break
@@ -38,35 +31,23 @@ def add_expense():
     
     while True:
         amount = input("Enter the amount spent: ").strip()
-        if not validate_amount(amount):
+        if not ledger.validate_amount(amount):
             print("❌ Invalid amount. Please enter a positive number.")
             continue
         break
 
-    with open(CSV_FILE, mode="a", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow([date, category, float(amount)])
+    ledger.append_expense(CSV_FILE, [date, category, amount], STORAGE)
     
     print("✅ Expense added successfully!\n")
 
-def view_expenses():
+def view_expenses(start="", end=""):
     try:
-        with open(CSV_FILE, mode="r") as file:
-            reader = csv.reader(file)
-            header = next(reader)  # Skip header
-            expenses = list(reader)
-
-            if not expenses:
-                print("No expenses recorded yet.")
-                return
-
-            print("\n📌 Your Expenses:")
-            print("-" * 50)
-            print(f"{'Date':<12} | {'Category':<15} | {'Amount':>10}")
-            print("-" * 50)
-            for row in expenses:
-                print(f"{row[0]:<12} | {row[1]:<15} | ${float(row[2]):>9.2f}")
-            print("-" * 50)
+        header = "\n".join(["\n📌 Your Expenses:", "-" * 50,
+                            f"{'Date':<12} | {'Category':<15} | {'Amount':>10}", "-" * 50])
+        shown = ledger.browse(CSV_FILE, lambda _, row: f"{row[0]:<12} | {row[1]:<15} | ${float(row[2]):>9.2f}",
+                              header, "-" * 50, STORAGE, VIEW_PAGE_SIZE, start, end)
+        if not shown:
+            print("No expenses in that date range." if start or end else "No expenses recorded yet.")
 
     except FileNotFoundError:
         print("No expenses found. Add some first!")
@@ -75,11 +56,7 @@ def view_expenses():
 
 def delete_expense():
     try:
-        with open(CSV_FILE, mode="r") as file:
-            reader = csv.reader(file)
-            expenses = list(reader)
-        
-        if len(expenses) <= 1:  # Only header exists
+        if not ledger.summarize(CSV_FILE, STORAGE).count:
             print("No expenses to delete.")
             return
 
@@ -88,50 +65,81 @@ def delete_expense():
         
         if choice == "1":
             date = input("Enter date to delete (YYYY-MM-DD): ")
-            updated_expenses = [row for row in expenses if row[0] != date]
+            matches = ledger.find_expenses(CSV_FILE, date=date, storage=STORAGE)
         elif choice == "2":
             category = input("Enter category to delete: ")
-            updated_expenses = [row for row in expenses if row[1].lower() != category.lower()]
+            matches = ledger.find_expenses(CSV_FILE, category=category, storage=STORAGE)
         else:
             print("❌ Invalid choice.")
             return
 
-        with open(CSV_FILE, mode="w", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerows(updated_expenses)
-        
-        deleted_count = len(expenses) - len(updated_expenses)
-        print(f"✅ Deleted {deleted_count} expense(s) successfully!")
+        if not matches:
+            print("No matching expenses found.")
+            return
+
+        confirm = input(f"Delete {len(matches)} expense(s)? (y/n): ").strip().lower()
+        if confirm != "y":
+            print("❌ Nothing deleted.")
+            return
+
+        ledger.delete_found(CSV_FILE, matches, STORAGE)
+        print(f"✅ Deleted {len(matches)} expense(s) successfully!")
 
     except Exception as e:
         print(f"Error deleting expenses: {e}")
 
-def total_by_category():
+def total_by_category(start="", end=""):
     try:
-        with open(CSV_FILE, mode="r") as file:
-            reader = csv.reader(file)
-            next(reader)  # Skip header
-            expenses = list(reader)
-        
-        if not expenses:
-            print("No expenses recorded yet.")
-            return
+        summary = ledger.summarize_between(CSV_FILE, start, end, STORAGE)
 
-        categories = {}
-        for row in expenses:
-            category = row[1]
-            amount = float(row[2])
-            categories[category] = categories.get(category, 0) + amount
+        if not summary.count:
+            if not (start or end):
+                print("No expenses recorded yet.")
+            return
 
         print("\n📊 Total Expenses by Category:")
         print("-" * 40)
-        for category, total in categories.items():
-            print(f"{category:<20} | ${total:>9.2f}")
+        for category, total in summary.by_category.items():
+            print(f"{category:<20} | ${total / 100:>9.2f}")
         print("-" * 40)
 
     except Exception as e:
         print(f"Error calculating totals: {e}")
 
+def batch_add_expenses():
+    print("\n📥 Batch Entry: one expense per line as YYYY-MM-DD,Category,Amount")
+    print("Leave the line empty to save them all.")
+    rows = []
+    while True:
+        line = input(f"{len(rows) + 1}> ").strip()
+        if not line:
+            break
+        row = [part.strip() for part in line.split(",")]
+        problem = ledger.check_expense(row)
+        if problem:
+            print(f"❌ Invalid line: {problem}.")
+            continue
+        row[1] = row[1] or "Uncategorized"
+        rows.append(row)
+
+    if not rows:
+        print("No expenses entered.")
+        return
+
+    start = time.perf_counter()
+    added = ledger.append_expenses(CSV_FILE, rows, BATCH_FLUSH_SIZE, STORAGE)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"✅ Added {added} expense(s) in {elapsed:.3f}s ({added / elapsed:,.0f} rows/sec)\n")
+
+def view_date_range():
+    start = input("From date (YYYY-MM-DD, empty for the first expense): ").strip()
+    end = input("To date (YYYY-MM-DD, empty for the last expense): ").strip()
+    if any(date and not ledger.validate_date(date) for date in (start, end)):
+        print("❌ Invalid date format. Please use YYYY-MM-DD.")
+        return
+    view_expenses(start, end)
+    total_by_category(start, end)
+
 def main():
     while True:
         print("\n📊 Expense Tracker")
@@ -139,9 +147,11 @@ def main():
         print("2️⃣ View Expenses")
         print("3️⃣ Delete Expense")
         print("4️⃣ Total by Category")
-        print("5️⃣ Exit")
+        print("5️⃣ Batch Add Expenses")
+        print("6️⃣ View Expenses by Date Range")
+        print("7️⃣ Exit")
 
-        choice = input("Choose an option (1-5): ")
+        choice = input("Choose an option (1-7): ")
 
         if choice == "1":
             add_expense()
@@ -152,6 +162,10 @@ def main():
         elif choice == "4":
             total_by_category()
         elif choice == "5":
+            batch_add_expenses()
+        elif choice == "6":
+            view_date_range()
+        elif choice == "7":
             print("Goodbye! 👋")
             break
         else:
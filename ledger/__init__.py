@@ -0,0 +1,25 @@
+"""Shared storage helpers for the expense trackers."""
+
+from ledger.aggregate import RANKED, Summary
+from ledger.amounts import format_cents, parse_cents
+from ledger.pager import PAGE_SIZE, browse, read_page, render_page
+from ledger.ranking import top_expenses
+from ledger.reader import Expense, file_stamp
+from ledger.rollup import report
+from ledger.storage import (
+    STORAGES,
+    append_expense,
+    append_expenses,
+    delete_expenses,
+    delete_found,
+    delete_row,
+    find_between,
+    find_expenses,
+    iter_expenses,
+    iter_numbered,
+    summarize,
+    summarize_between,
+)
+from ledger.validate import check_expense, validate_amount, validate_date
+from ledger.wal import WriteAheadLog, checkpoint
+from ledger.writer import COMPACT_THRESHOLD, FLUSH_SIZE, compact, dead_ratio
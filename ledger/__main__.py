@@ -0,0 +1,215 @@
+"""Command line maintenance tools for expense ledgers.
+
+Run from the repository root, e.g.:
+
+    python -m ledger to-columnar kenny/expenses.csv
+    python -m ledger to-sqlite placide/expenses.csv
+    python -m ledger compact arnaud/expenses.csv
+    python -m ledger serve arnaud/expenses.csv --socket /tmp/ledger.sock
+    python -m ledger alias kenny/expenses.csv groceries Food
+    python -m ledger top arnaud/expenses.csv -k 5 --by month
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import time
+
+from ledger import bulk_import, columnar, consolidate, ranking, rollup, server, sqlstore, storage, wal, writer
+from ledger.aggregate import RANKED
+from ledger.amounts import format_cents
+from ledger.categories import load_categories
+
+def to_columnar(args):
+    store = columnar.import_csv(args.csv_file, args.store)
+    print(f"✅ Imported {len(store)} expense(s) into {store.path}")
+
+def to_sqlite(args):
+    store = sqlstore.import_csv(args.csv_file, args.store)
+    print(f"✅ Imported {len(store)} expense(s) into {store.path}")
+
+def to_csv(args):
+    module = sqlstore if args.storage == "sqlite" else columnar
+    store = module.export_csv(args.csv_file, args.store)
+    print(f"✅ Exported {len(store)} expense(s) to {args.csv_file}")
+
+def compact(args):
+    wal.checkpoint(args.csv_file)
+    ratio = writer.dead_ratio(args.csv_file)
+    dropped = writer.compact(args.csv_file, 0.0 if args.force else args.threshold)
+    if dropped:
+        print(f"✅ Compacted {args.csv_file}: dropped {dropped} deleted row(s)")
+    else:
+        print(f"Nothing to do: {ratio:.0%} of rows are deleted (threshold {args.threshold:.0%})")
+
+def import_csv(args):
+    start = time.perf_counter()
+    imported, rejected = bulk_import.import_files(
+        args.csv_file, args.sources, args.rejects, args.workers, args.chunk_size)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"✅ Imported {imported} expense(s) into {args.csv_file} "
+          f"in {elapsed:.2f}s ({(imported + rejected) / elapsed:,.0f} rows/sec)")
+    if rejected:
+        print(f"❌ Rejected {rejected} row(s), see {args.rejects or bulk_import.rejects_path(args.csv_file)}")
+
+def checkpoint(args):
+    rows = wal.checkpoint(args.csv_file)
+    print(f"✅ Copied {rows} expense(s) from {wal.wal_path(args.csv_file)} into {args.csv_file}")
+
+def report(args):
+    periods = rollup.report(args.csv_file, args.by, args.start, args.end, args.storage)
+    if not periods:
+        print("No expenses recorded yet.")
+        return
+    print(f"\n📅 Totals by {args.by.capitalize()} and Category:")
+    print("-" * 60)
+    for period, totals in periods.items():
+        for category, (total, count, highest) in sorted(totals.items()):
+            print(f"{period:<8} | {category:<20} | {count:>7} | ${format_cents(total):>12} | "
+                  f"max ${format_cents(highest):>10}")
+    print("-" * 60)
+
+def top(args):
+    ranked = ranking.top_expenses(args.csv_file, args.k, args.by, args.cheapest, args.storage)
+    if not ranked:
+        print("No expenses recorded yet.")
+        return
+    title = "Cheapest" if args.cheapest else "Most Expensive"
+    print(f"\n💰 {args.k} {title} Expenses" + (f" by {args.by.capitalize()}:" if args.by else ":"))
+    print("-" * 60)
+    groups = ranked.items() if args.by else [(None, ranked)]
+    for group, expenses in groups:
+        for rank, expense in enumerate(expenses, start=1):
+            prefix = "" if group is None else f"{group:<8} | "
+            print(f"{prefix}{rank:>3}. {expense.date} | {expense.category:<20} | ${expense.amount:>10}")
+    print("-" * 60)
+
+def consolidate_ledgers(args):
+    result = consolidate.consolidate(args.root, args.output, args.workers)
+    print("\n👥 Totals by User:")
+    print("-" * 40)
+    for user, totals in result["users"].items():
+        print(f"{user:<20} | {totals['count']:>7} | ${format_cents(totals['total']):>12}")
+    print("-" * 40)
+    print("\n📊 Totals by Category:")
+    print("-" * 40)
+    for category, cents in sorted(result["categories"].items()):
+        print(f"{category:<20} | ${format_cents(cents):>12}")
+    print("-" * 40)
+    if args.output:
+        print(f"✅ Merged {result['merged']} expense(s) by date into {args.output}")
+    if result["skipped"]:
+        print(f"❌ Skipped {result['skipped']} row(s) with an invalid date or amount")
+
+def alias(args):
+    categories = load_categories(args.csv_file)
+    if args.alias and not args.category:
+        print(f"❌ Which category does {args.alias!r} stand for? e.g. alias {args.csv_file} groceries Food")
+        return
+    if args.alias:
+        category_id = categories.add_alias(args.alias, args.category)
+        print(f"✅ {args.alias!r} now counts as {categories.names[category_id]!r}")
+        return
+    if not categories.names:
+        print("No categories recorded yet.")
+        return
+    print("\n🏷️ Categories and their aliases:")
+    print("-" * 40)
+    for category_id, name in enumerate(categories.names):
+        keys = categories.keys_of(category_id)
+        if keys:
+            print(f"{name:<20} | {', '.join(sorted(keys))}")
+    print("-" * 40)
+
+def serve(args):
+    if not os.path.exists(args.csv_file):
+        with open(args.csv_file, mode="w", newline="") as file:
+            csv.writer(file).writerow(["Date", "Category", "Amount"])
+    print(f"Serving {args.csv_file} on {args.socket} (Ctrl+C to stop)")
+    asyncio.run(server.serve_until_signalled(args.csv_file, args.socket, args.storage))
+    print("Goodbye! 👋")
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m ledger", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("to-columnar", help="copy a CSV ledger into columnar storage")
+    command.add_argument("csv_file", help="the Date,Category,Amount CSV file")
+    command.add_argument("--store", help="columnar directory (default: next to the CSV file)")
+    command.set_defaults(run=to_columnar)
+
+    command = commands.add_parser("to-sqlite", help="copy a CSV ledger into a SQLite database")
+    command.add_argument("csv_file", help="the Date,Category,Amount CSV file")
+    command.add_argument("--store", help="database file (default: next to the CSV file)")
+    command.set_defaults(run=to_sqlite)
+
+    command = commands.add_parser("to-csv", help="write columnar or SQLite storage back out as CSV")
+    command.add_argument("csv_file", help="the Date,Category,Amount CSV file to write")
+    command.add_argument("--storage", choices=("columnar", "sqlite"), default="columnar",
+                         help="storage to export (default: %(default)s)")
+    command.add_argument("--store", help="columnar directory or database file (default: next to the CSV file)")
+    command.set_defaults(run=to_csv)
+
+    command = commands.add_parser("compact", help="rewrite a CSV ledger without its deleted rows")
+    command.add_argument("csv_file", help="the Date,Category,Amount CSV file")
+    command.add_argument("--threshold", type=float, default=writer.COMPACT_THRESHOLD,
+                         help="only rewrite when at least this share of rows is deleted (default: %(default)s)")
+    command.add_argument("--force", action="store_true", help="rewrite whenever any row is deleted")
+    command.set_defaults(run=compact)
+
+    command = commands.add_parser("import", help="validate and append rows from other CSV files")
+    command.add_argument("csv_file", help="the ledger to append to")
+    command.add_argument("sources", nargs="+", help="Date,Category,Amount files to import")
+    command.add_argument("--rejects", help="where to write rejected rows (default: CSV_FILE.rejects.csv)")
+    command.add_argument("--workers", type=int, help="validation processes (default: one per CPU)")
+    command.add_argument("--chunk-size", type=int, default=bulk_import.CHUNK_SIZE,
+                         help="rows per validation task (default: %(default)s)")
+    command.set_defaults(run=import_csv)
+
+    command = commands.add_parser("checkpoint", help="fold a CSV ledger's write-ahead log into it")
+    command.add_argument("csv_file", help="the Date,Category,Amount CSV file")
+    command.set_defaults(run=checkpoint)
+
+    command = commands.add_parser("report", help="totals, counts and maxima per category and month or year")
+    command.add_argument("csv_file", help="the Date,Category,Amount CSV file")
+    command.add_argument("--by", choices=rollup.PERIODS, default="month", help="period (default: %(default)s)")
+    command.add_argument("--start", help="first month, YYYY-MM")
+    command.add_argument("--end", help="last month, YYYY-MM")
+    command.add_argument("--storage", choices=storage.STORAGES, default="csv",
+                         help="where the ledger is kept (default: %(default)s)")
+    command.set_defaults(run=report)
+
+    command = commands.add_parser("top", help="the most or least expensive expenses, overall or per group")
+    command.add_argument("csv_file", help="the Date,Category,Amount CSV file")
+    command.add_argument("-k", type=int, default=RANKED, help="expenses per group (default: %(default)s)")
+    command.add_argument("--by", choices=ranking.GROUPINGS, help="rank each category or month apart")
+    command.add_argument("--cheapest", action="store_true", help="the cheapest expenses instead")
+    command.add_argument("--storage", choices=storage.STORAGES, default="csv",
+                         help="where the ledger is kept (default: %(default)s)")
+    command.set_defaults(run=top)
+
+    command = commands.add_parser("consolidate", help="merge every */expenses.csv ledger")
+    command.add_argument("--root", default=".", help="directory holding the per-user folders (default: .)")
+    command.add_argument("--output", help="write the merged rows, ordered by date, to this CSV")
+    command.add_argument("--workers", type=int, help="scanning processes (default: one per CPU)")
+    command.set_defaults(run=consolidate_ledgers)
+
+    command = commands.add_parser("alias", help="list categories, or make a word an alias of one")
+    command.add_argument("csv_file", help="the Date,Category,Amount CSV file")
+    command.add_argument("alias", nargs="?", help="the word to treat as CATEGORY")
+    command.add_argument("category", nargs="?", help="the category it stands for")
+    command.set_defaults(run=alias)
+
+    command = commands.add_parser("serve", help="answer JSON-lines requests on a Unix socket")
+    command.add_argument("csv_file", help="the Date,Category,Amount CSV file (created if missing)")
+    command.add_argument("--socket", default="ledger.sock", help="socket path (default: %(default)s)")
+    command.add_argument("--storage", choices=storage.STORAGES, default="csv",
+                         help="where the ledger is kept (default: %(default)s)")
+    command.set_defaults(run=serve)
+
+    args = parser.parse_args()
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,481 @@
+import csv
+import heapq
+
+from ledger.amounts import parse_cents
+from ledger.categories import load_categories
+from ledger.dates import parse_month
+from ledger.reader import Expense, ledger_stamp
+from ledger.rowindex import head_crc, tail_crc
+from ledger.sidecar import held_stamp, load_sidecar, save_sidecar
+from ledger.tombstones import load_deleted
+
+# Most and least expensive rows kept per category and per month
+RANKED = 10
+
+_INFINITY = float("inf")
+
+def keep_ranked(heap, entry, k=RANKED):
+    """Pushes entry onto a min-heap of at most k entries, dropping the smallest."""
+    if len(heap) < k:
+        heapq.heappush(heap, entry)
+    elif entry > heap[0]:
+        heapq.heapreplace(heap, entry)
+
+class Summary:
+    """Count, sum, min, max, mean and per-category totals of a ledger.
+
+    All amounts are integer cents. Rows whose amount does not parse (old
+    ledgers were written without validation) are counted in skipped and
+    left out of everything else.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.skipped = 0
+        self.total = 0
+        self.minimum = None  # Cheapest Expense row
+        self.maximum = None  # Most expensive Expense row
+        self.min_amount = None
+        self.max_amount = None
+        self.by_category = {}
+        self.category_counts = {}
+        # Rollup cube: (year, month) -> category -> [total, count, max];
+        # max is None when a deletion took it away, see ledger/rollup.py
+        self.months = {}
+        # Category or (year, month) -> [largest, smallest, low, high]:
+        # min-heaps of the RANKED most expensive rows as (cents, Expense)
+        # and of the RANKED cheapest as (-cents, Expense), then the band
+        # of amounts that rank in neither (see _set_band). A heap is None
+        # when a deletion took away one of its rows, see ledger/ranking.py
+        self.ranked_by_category = {}
+        self.ranked_by_month = {}
+        # False when neither months nor the heaps are kept: the summary
+        # was read back from the running totals alone (see store_summary)
+        self.rollup = True
+        # How much of the CSV file has been folded in: bytes, expense rows
+        # (deleted ones included), and the CRC32 of the last and of the
+        # first bytes read
+        self.offset = 0
+        self.rows = 0
+        self.crc = 0
+        self.head_crc = 0
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def row_count(self):
+        """Live rows in the ledger, skipped ones included."""
+        return self.count + self.skipped
+
+    def add(self, expense):
+        """Folds one expense row into the summary."""
+        try:
+            amount = parse_cents(expense.amount)
+        except ValueError:
+            self.skipped += 1
+            return
+        category = expense.category
+        self.count += 1
+        self.total += amount
+        self.by_category[category] = self.by_category.get(category, 0) + amount
+        self.category_counts[category] = self.category_counts.get(category, 0) + 1
+        if self.max_amount is None or amount > self.max_amount:
+            self.maximum, self.max_amount = expense, amount
+        if self.min_amount is None or amount < self.min_amount:
+            self.minimum, self.min_amount = expense, amount
+        if not self.rollup:
+            return
+        heaps = self.ranked_by_category.get(category)
+        if heaps is None or not heaps[2] < amount < heaps[3]:
+            _rank(self.ranked_by_category, category, amount, expense)
+        try:
+            month = parse_month(expense.date)
+        except ValueError:
+            return  # No month to file it under
+        heaps = self.ranked_by_month.get(month)
+        if heaps is None or not heaps[2] < amount < heaps[3]:
+            _rank(self.ranked_by_month, month, amount, expense)
+        buckets = self.months.setdefault(month, {})
+        bucket = buckets.get(category)
+        if bucket is None:
+            buckets[category] = [amount, 1, amount]
+        else:
+            bucket[0] += amount
+            bucket[1] += 1
+            if bucket[2] is not None and amount > bucket[2]:
+                bucket[2] = amount
+
+    def remove(self, expense):
+        """Takes one expense row back out of the summary.
+
+        Returns False when the row was the minimum or maximum, because the
+        new extreme can only be found by scanning the ledger again.
+        """
+        try:
+            amount = parse_cents(expense.amount)
+        except ValueError:
+            self.skipped -= 1
+            return True
+        category = expense.category
+        self.count -= 1
+        self.total -= amount
+        self.category_counts[category] -= 1
+        if self.category_counts[category]:
+            self.by_category[category] -= amount
+        else:
+            del self.category_counts[category]
+            del self.by_category[category]
+        if not self.rollup:
+            return amount != self.max_amount and amount != self.min_amount
+        _unrank(self.ranked_by_category, category, amount, expense, self.category_counts.get(category, 0))
+        try:
+            month = parse_month(expense.date)
+        except ValueError:
+            month = None
+        if month is not None:
+            buckets = self.months[month]
+            bucket = buckets[category]
+            if bucket[1] == 1:
+                del buckets[category]
+                if not buckets:
+                    del self.months[month]
+            else:
+                bucket[0] -= amount
+                bucket[1] -= 1
+                if amount == bucket[2]:
+                    bucket[2] = None  # Unknown until the month is read again
+            remaining = sum(bucket[1] for bucket in self.months.get(month, {}).values())
+            _unrank(self.ranked_by_month, month, amount, expense, remaining)
+        return amount != self.max_amount and amount != self.min_amount
+
+    def merge_categories(self, canonical):
+        """Folds the totals of every spelling of a category into the one
+        canonical(spelling) returns; returns self."""
+        by_category, counts, self.by_category, self.category_counts = (
+            self.by_category, self.category_counts, {}, {})
+        for category, total in by_category.items():
+            name = canonical(category)
+            self.by_category[name] = self.by_category.get(name, 0) + total
+            self.category_counts[name] = self.category_counts.get(name, 0) + counts[category]
+        for month, buckets in self.months.items():
+            merged = {}
+            for category, bucket in buckets.items():
+                name = canonical(category)
+                known = merged.get(name)
+                if known is None:
+                    merged[name] = list(bucket)
+                else:
+                    known[0] += bucket[0]
+                    known[1] += bucket[1]
+                    known[2] = None if None in (known[2], bucket[2]) else max(known[2], bucket[2])
+            self.months[month] = merged
+        ranked, self.ranked_by_category = self.ranked_by_category, {}
+        for category, heaps in ranked.items():
+            name = canonical(category)
+            heaps = [_respelled(heap, canonical) for heap in heaps[:2]]
+            known = self.ranked_by_category.get(name)
+            if known is not None:
+                heaps = [None if None in (mine, theirs) else heapq.nlargest(RANKED, mine + theirs)[::-1]
+                         for mine, theirs in zip(known, heaps)]
+            self.ranked_by_category[name] = _set_band(heaps)
+        for month, heaps in self.ranked_by_month.items():
+            self.ranked_by_month[month] = _set_band([_respelled(heap, canonical) for heap in heaps[:2]])
+        for extreme in ("minimum", "maximum"):
+            expense = getattr(self, extreme)
+            if expense is not None:
+                setattr(self, extreme, expense._replace(category=canonical(expense.category)))
+        return self
+
+    def to_state(self):
+        return {
+            "count": self.count,
+            "skipped": self.skipped,
+            "total": self.total,
+            "categories": {
+                category: [total, self.category_counts[category]]
+                for category, total in self.by_category.items()
+            },
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "offset": self.offset,
+            "rows": self.rows,
+            "crc": self.crc,
+            "head_crc": self.head_crc,
+        }
+
+    def rollup_state(self):
+        """Returns what to_state() leaves out: the month cube and the heaps."""
+        return {
+            "months": [
+                [year, month, category, *bucket]
+                for (year, month), buckets in self.months.items()
+                for category, bucket in buckets.items()
+            ],
+            "ranked_by_category": {
+                category: heaps[:2] for category, heaps in self.ranked_by_category.items()
+            },
+            "ranked_by_month": [
+                [year, month, *heaps[:2]] for (year, month), heaps in self.ranked_by_month.items()
+            ],
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        summary = cls()
+        summary.count = state["count"]
+        summary.skipped = state["skipped"]
+        summary.total = state["total"]
+        for category, (total, count) in state["categories"].items():
+            summary.by_category[category] = total
+            summary.category_counts[category] = count
+        if state["maximum"] is not None:
+            summary.maximum = Expense(*state["maximum"])
+            summary.max_amount = parse_cents(summary.maximum.amount)
+        if state["minimum"] is not None:
+            summary.minimum = Expense(*state["minimum"])
+            summary.min_amount = parse_cents(summary.minimum.amount)
+        summary.rollup = "months" in state
+        for year, month, category, *bucket in state.get("months", ()):
+            summary.months.setdefault((year, month), {})[category] = bucket
+        for category, heaps in state.get("ranked_by_category", {}).items():
+            summary.ranked_by_category[category] = _set_band([_heap_from_state(heap) for heap in heaps])
+        for year, month, *heaps in state.get("ranked_by_month", ()):
+            summary.ranked_by_month[(year, month)] = _set_band([_heap_from_state(heap) for heap in heaps])
+        summary.offset = state["offset"]
+        summary.rows = state["rows"]
+        summary.crc = state["crc"]
+        summary.head_crc = state["head_crc"]
+        return summary
+
+    def copy(self):
+        summary = Summary()
+        summary.__dict__.update(self.__dict__)
+        summary.by_category = dict(self.by_category)
+        summary.category_counts = dict(self.category_counts)
+        summary.months = {month: {category: list(bucket) for category, bucket in buckets.items()}
+                          for month, buckets in self.months.items()}
+        summary.ranked_by_category = _copy_ranked(self.ranked_by_category)
+        summary.ranked_by_month = _copy_ranked(self.ranked_by_month)
+        return summary
+
+def _copy_ranked(ranked):
+    # Entries are immutable tuples, so copying the heaps is enough
+    return {group: [None if heap is None else list(heap) for heap in heaps[:2]] + heaps[2:]
+            for group, heaps in ranked.items()}
+
+def _rank(ranked, group, amount, expense):
+    """Offers a new row to the heaps of its category or month."""
+    heaps = ranked.get(group)
+    if heaps is None:
+        heaps = ranked[group] = [[(amount, expense)], [(-amount, expense)]]
+    else:
+        largest, smallest = heaps[0], heaps[1]
+        if largest is not None:
+            keep_ranked(largest, (amount, expense))
+        if smallest is not None:
+            keep_ranked(smallest, (-amount, expense))
+    _set_band(heaps)
+
+def _set_band(heaps):
+    """Sets heaps[2] and heaps[3] to the amounts strictly between which a
+    new row ranks in neither heap, so Summary.add skips most rows after
+    one comparison."""
+    largest, smallest = heaps[0], heaps[1]
+    if smallest is None:
+        low = -_INFINITY
+    else:
+        low = -smallest[0][0] if len(smallest) == RANKED else _INFINITY
+    if largest is None:
+        high = _INFINITY
+    else:
+        high = largest[0][0] if len(largest) == RANKED else -_INFINITY
+    heaps[2:] = [low, high]
+    return heaps
+
+def refill_ranked(heaps, side, entries):
+    """Rebuilds heaps[side] (0: largest, 1: smallest) of a ranked_by_category
+    or ranked_by_month value that a deletion left None, from the entries
+    of every row of its group."""
+    heaps[side] = heapq.nlargest(RANKED, entries)[::-1]
+    _set_band(heaps)
+
+def _unrank(ranked, group, amount, expense, remaining):
+    """Takes a deleted row out of the heaps of its category or month.
+
+    remaining is the group's row count without it. A heap that held every
+    row of the group just loses the entry; a full one could only be
+    refilled from the rows, so it becomes None.
+    """
+    heaps = ranked.get(group)
+    if not remaining:
+        ranked.pop(group, None)
+        return
+    if heaps is None:
+        return
+    for side, entry in enumerate(((amount, expense), (-amount, expense))):
+        heap = heaps[side]
+        if heap is None or entry not in heap:
+            continue
+        if len(heap) > remaining:
+            heap.remove(entry)
+            heapq.heapify(heap)
+        else:
+            heaps[side] = None
+    _set_band(heaps)
+
+def _respelled(heap, canonical):
+    if heap is None:
+        return None
+    heap = [(amount, expense._replace(category=canonical(expense.category))) for amount, expense in heap]
+    heapq.heapify(heap)
+    return heap
+
+def _heap_from_state(heap):
+    return None if heap is None else [(amount, Expense(*expense)) for amount, expense in heap]
+
+# path -> (ledger stamp, Summary) of the last scan
+_summaries = {}
+
+def known_summary(path, stamp, rollup=False):
+    """Returns the Summary for exactly this stamp without reading the CSV,
+    or None. With rollup, only one that keeps the rollup will do."""
+    cached = _summaries.get(path)
+    if cached is not None and cached[0] == stamp and (cached[1].rollup or not rollup):
+        return cached[1]
+    name = "rollup" if rollup else "totals"
+    if held_stamp(path, name) != list(stamp):
+        return None
+    state = load_sidecar(path, name)
+    if state is None or state["stamp"] != list(stamp):
+        return None
+    summary = Summary.from_state(state)
+    _summaries[path] = (stamp, summary)
+    return summary
+
+def store_summary(path, summary, stamp=None, rollup=False):
+    """Records summary as the state of the file at path for stamp.
+
+    The running totals are saved every time. The rollup (the month cube
+    and the ranked heaps) is much larger, so it is only saved, with the
+    totals, in the rollup sidecar when rollup is true: for the queries
+    that need it and for deletions. Appends leave the saved rollup
+    behind, and summarize() folds the rows appended since into it when it
+    is next needed.
+
+    If the summary stops short of the end of the file (rows arrived while
+    it was being read, or the last line is incomplete), it is stored so
+    that it never matches exactly but can still be resumed.
+    """
+    if stamp is None:
+        stamp = ledger_stamp(path)
+    with open(path, mode="rb") as file:
+        summary.crc = tail_crc(file, summary.offset)
+        summary.head_crc = head_crc(file, summary.offset)
+    if summary.offset != stamp[1]:
+        stamp = (stamp[0], summary.offset, -1, *stamp[3:])
+    _summaries[path] = (stamp, summary)
+    state = summary.to_state()
+    save_sidecar(path, stamp, state)
+    if rollup and summary.rollup:
+        save_sidecar(path, stamp, dict(state, **summary.rollup_state()), "rollup")
+
+def _resumable(path, stamp, rollup=False):
+    """Returns a saved Summary that covers a prefix of the file as it is
+    now, or None if the file was rewritten, truncated, had rows deleted by
+    someone else or had categories merged since. With rollup, only one
+    that keeps the rollup will do.
+
+    The one in memory is taken over rather than copied, so that resuming
+    costs the same however large the rollup: a Summary summarize() returned
+    moves on with the appends that follow, unless the caller copies it.
+
+    The prefix is checked by the CRC32 of its first and last bytes. A file
+    that was modified without growing past the summary was edited in place
+    (appending always grows it), so that is a rewrite too.
+    """
+    with open(path, mode="rb") as file:
+        for saved_stamp, summary in _saved_summaries(path, rollup):
+            if (saved_stamp[0] == stamp[0] and saved_stamp[3:] == stamp[3:]
+                    and summary.offset < stamp[1] and tail_crc(file, summary.offset) == summary.crc
+                    and head_crc(file, summary.offset) == summary.head_crc):
+                if _summaries.get(path, (None, None))[1] is summary:
+                    del _summaries[path]  # Until it is stored again
+                return summary
+    return None
+
+def _saved_summaries(path, rollup=False):
+    """Yields the (stamp, Summary) in memory, then the sidecar's, which is
+    only read if the first one would not do. With rollup, only those that
+    keep the rollup."""
+    cached = _summaries.get(path)
+    if cached is not None and (cached[1].rollup or not rollup):
+        yield cached
+    state = load_sidecar(path, "rollup" if rollup else "totals")
+    if state is not None:
+        yield tuple(state["stamp"]), Summary.from_state(state)
+
+def saved_categories(path):
+    """Returns the categories of the last saved Summary, under the names
+    their rows were totalled under."""
+    for _, summary in _saved_summaries(path):
+        return list(summary.by_category)
+    return []
+
+def _complete_lines(file, summary):
+    """Yields the complete lines after summary.offset, advancing it."""
+    file.seek(summary.offset)
+    for line in file:
+        if not line.endswith(b"\n"):  # Still being written
+            break
+        summary.offset += len(line)
+        yield line.decode()
+
+def _fold(path, summary, deleted):
+    """Folds the rows after summary.offset into summary."""
+    canonical = load_categories(path).canonical
+    with open(path, mode="rb") as file:
+        reader = csv.reader(_complete_lines(file, summary))
+        if not summary.offset:
+            next(reader, None)  # Skip header
+        for row in reader:
+            if len(row) < 3:  # Blank or truncated line
+                continue
+            summary.rows += 1
+            if summary.rows not in deleted:
+                summary.add(Expense(row[0], canonical(row[1]), row[2]))
+
+def resume(path, stamp, rollup=False):
+    """Returns the Summary for stamp, if one is known or only misses rows
+    appended since; else None, so callers never pay for a full scan. With
+    rollup, only one that keeps the rollup will do."""
+    summary = known_summary(path, stamp, rollup)
+    if summary is None:
+        summary = _resumable(path, stamp, rollup)
+        if summary is not None:
+            _fold(path, summary, load_deleted(path) if stamp[3] else set())
+            store_summary(path, summary, stamp, rollup)
+    return summary
+
+def catch_up(path):
+    """Folds rows appended since the last summary into it, saving only
+    the running totals."""
+    resume(path, ledger_stamp(path))
+
+def summarize(path, rollup=False):
+    """Returns the Summary of the CSV file; with rollup, one that keeps
+    the month cube and the ranked heaps.
+
+    The answer comes from memory or from the sidecars when they match the
+    file. If rows were only appended since, just those rows are read; if
+    the file was rewritten or truncated, it is scanned again.
+    """
+    stamp = ledger_stamp(path)
+    summary = resume(path, stamp, rollup)
+    if summary is None:
+        summary = Summary()
+        summary.rollup = rollup
+        _fold(path, summary, load_deleted(path))
+        store_summary(path, summary, stamp, rollup)
+    return summary
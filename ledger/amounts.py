@@ -0,0 +1,61 @@
+"""Exact amounts as integer cents.
+
+Amounts are parsed straight from their text into an int number of cents,
+so totals over any number of rows are exact. Plain "1000" goes through
+int(), and plain "12.5" or "100000.25" through float(), which is exact to
+the cent for up to FLOAT_DIGITS whole digits; anything else (signs,
+spaces, more than two decimals, longer amounts) goes through Decimal and
+is rounded half-to-even. Exponents ("1e5") are refused, and so are
+amounts of MAX_DIGITS whole digits or more, before any arithmetic.
+"""
+
+from decimal import ROUND_HALF_EVEN, Decimal, DecimalException
+
+# Amounts are stored as int64 cents
+MAX_CENTS = 2**63 - 1
+
+# Whole digits of an amount with decimals that float() parses exactly to
+# the cent: amount * 100 stays below 10**15, so the two roundings of
+# round(float(text) * 100) stay well within half a cent
+FLOAT_DIGITS = 13
+
+# Whole digits from which no amount fits in MAX_CENTS
+MAX_DIGITS = 18
+
+def parse_cents(text):
+    """Returns the amount in text as integer cents; raises ValueError if invalid."""
+    dot = text.find(".")
+    if dot < 0:
+        if text.isdigit() and text.isascii():
+            return int(text) * 100
+    elif (0 < dot <= FLOAT_DIGITS and len(text) - dot <= 3 and text.isascii()
+            and text.replace(".", "", 1).isdigit()):
+        return round(float(text) * 100)
+    return _parse_cents_slow(text)
+
+def _parse_cents_slow(text):
+    """Handles signs, spaces, missing digits and extra decimals."""
+    if "e" in text or "E" in text:
+        raise ValueError(f"invalid amount {text!r}, exponents are not accepted")
+    try:
+        value = Decimal(text.strip())
+        if not value.is_finite():
+            raise ValueError(f"invalid amount {text!r}")
+        if value and value.adjusted() >= MAX_DIGITS - 1:
+            raise ValueError(f"amount {text!r} out of range")
+        return int((value * 100).to_integral_value(ROUND_HALF_EVEN))
+    except DecimalException:
+        raise ValueError(f"invalid amount {text!r}") from None
+
+def format_cents(cents):
+    """Returns the canonical text of an amount in cents, e.g. "1234.50"."""
+    sign = "-" if cents < 0 else ""
+    whole, fraction = divmod(abs(cents), 100)
+    return f"{sign}{whole}.{fraction:02d}"
+
+def canonical_amount(text):
+    """Rewrites an amount in canonical form, leaving unparsable text as it is."""
+    try:
+        return format_cents(parse_cents(text))
+    except ValueError:
+        return text
@@ -0,0 +1,105 @@
+"""The trackers' menu operations without input() or print().
+
+Each function takes the CSV path and storage (see ledger/storage.py) and
+returns plain dicts, lists and ints, ready for json.dumps(); bad input,
+arguments of the wrong type included, raises ValueError. Expenses come back as {"date", "category", "amount"}
+with the amount as stored; totals are integer cents, like Summary's.
+ledger/server.py serves these functions over a Unix socket.
+"""
+
+from itertools import islice
+
+from ledger import ranking, storage as storages
+from ledger.aggregate import RANKED
+from ledger.validate import check_expense
+
+# Argument types, named as JSON names them
+_TYPE_NAMES = {str: "a string", int: "an integer", float: "a number", bool: "true or false",
+               list: "an array", dict: "an object", type(None): "null"}
+
+def _expect(kind, optional=True, **arguments):
+    """Raises ValueError unless every argument is of type kind (None too
+    if optional; True and False are not integers here)."""
+    for name, value in arguments.items():
+        if type(value) is not kind and not (optional and value is None):
+            raise ValueError(f"{name} must be {_TYPE_NAMES[kind]}, not "
+                             f"{_TYPE_NAMES.get(type(value), type(value).__name__)}")
+
+def _as_dict(expense, number=None):
+    row = {"date": expense.date, "category": expense.category, "amount": expense.amount}
+    if number is not None:
+        row["number"] = number
+    return row
+
+def add_expense(path, date, category, amount, storage="csv"):
+    """Validates and appends one expense; returns it."""
+    _expect(str, optional=False, date=date, category=category, amount=amount)
+    problem = check_expense([date, category, amount])
+    if problem is not None:
+        raise ValueError(problem)
+    return _as_dict(storages.append_expense(path, [date, category, amount], storage))
+
+def list_expenses(path, start=None, end=None, date=None, category=None, offset=0, limit=None,
+                  storage="csv"):
+    """Returns the expenses, optionally filtered, from the offset-th on.
+
+    date and category (case-insensitive) pick exact matches; start and end
+    (YYYY-MM-DD, inclusive) a date range, in date order. Without filters
+    the rows keep their order and carry the "number" that
+    delete_expenses(number=...) takes.
+    """
+    _expect(str, start=start, end=end, date=date, category=category)
+    _expect(int, optional=False, offset=offset)
+    _expect(int, limit=limit)
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("offset and limit must not be negative")
+    stop = None if limit is None else offset + limit
+    if date or category:
+        found = storages.find_expenses(path, date, category, storage)
+    elif start or end:
+        found = storages.find_between(path, start, end, storage)
+    else:
+        numbered = storages.iter_numbered(path, offset + 1, storage)
+        return [_as_dict(expense, number) for number, expense in islice(numbered, limit)]
+    return [_as_dict(expense) for _, expense in islice(found, offset, stop)]
+
+def delete_expenses(path, date=None, category=None, number=None, storage="csv"):
+    """Deletes the expense with this row number, or every expense with this
+    date or category; returns the deleted expenses."""
+    _expect(str, date=date, category=category)
+    _expect(int, number=number)
+    if number is not None:
+        expense = storages.delete_row(path, number, storage)
+        return [] if expense is None else [_as_dict(expense)]
+    if not date and not category:
+        raise ValueError("expected a date, a category or a row number")
+    matches = storages.find_expenses(path, date, category, storage)
+    if matches:
+        storages.delete_found(path, matches, storage)
+    return [_as_dict(expense) for _, expense in matches]
+
+def aggregate(path, start=None, end=None, storage="csv"):
+    """Returns the count, total, mean, cheapest and most expensive expense
+    and per-category totals, over the date range if one is given."""
+    _expect(str, start=start, end=end)
+    summary = storages.summarize_between(path, start, end, storage)
+    return {
+        "count": summary.count,
+        "total": summary.total,
+        "mean": round(summary.mean),
+        "cheapest": None if summary.minimum is None else _as_dict(summary.minimum),
+        "most_expensive": None if summary.maximum is None else _as_dict(summary.maximum),
+        "categories": {category: {"total": total, "count": summary.category_counts[category]}
+                       for category, total in summary.by_category.items()},
+    }
+
+def top_expenses(path, k=RANKED, by=None, cheapest=False, storage="csv"):
+    """Returns the k most expensive expenses, or the k cheapest, overall or
+    as {category or "YYYY-MM": [...]} with by="category" or "month"."""
+    _expect(int, optional=False, k=k)
+    _expect(str, by=by)
+    _expect(bool, optional=False, cheapest=cheapest)
+    ranked = ranking.top_expenses(path, k, by, cheapest, storage)
+    if by is None:
+        return [_as_dict(expense) for expense in ranked]
+    return {group: [_as_dict(expense) for expense in expenses] for group, expenses in ranked.items()}
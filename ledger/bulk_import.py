@@ -0,0 +1,97 @@
+"""Non-interactive import of Date,Category,Amount CSV files.
+
+Rows are read in chunks, validated in a process pool with the same date
+and amount rules as the trackers' add_expense, and the valid ones are
+streamed into the ledger in file order. Rejected rows go to a separate
+CSV together with their source, line number and reason.
+
+    python -m ledger import kenny/expenses.csv bank-2024.csv bank-2025.csv
+"""
+
+import csv
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from ledger.amounts import canonical_amount
+from ledger.reader import Expense
+from ledger.validate import check_expense
+from ledger.writer import Appender
+
+CHUNK_SIZE = 20000
+
+def rejects_path(path):
+    return path + ".rejects.csv"
+
+def _read_chunks(sources, chunk_size):
+    """Yields (source, [(line number, row)]) chunks of the source files."""
+    for source in sources:
+        with open(source, mode="r", newline="") as file:
+            reader = csv.reader(file)
+            chunk = []
+            for row in reader:
+                if not row:
+                    continue
+                if reader.line_num == 1 and row[0].strip().lower() == "date":
+                    continue  # Header
+                chunk.append((reader.line_num, row))
+                if len(chunk) >= chunk_size:
+                    yield source, chunk
+                    chunk = []
+            if chunk:
+                yield source, chunk
+
+def _check_chunk(source, chunk):
+    """Splits one chunk into valid Expense rows and rejected rows."""
+    valid = []
+    rejected = []
+    for line_num, row in chunk:
+        row = [field.strip() for field in row]
+        problem = check_expense(row)
+        if problem is None:
+            valid.append(Expense(row[0], row[1], canonical_amount(row[2])))
+        else:
+            rejected.append([source, line_num, problem, *row])
+    return valid, rejected
+
+def import_files(path, sources, rejects=None, workers=None, chunk_size=CHUNK_SIZE):
+    """Validates the rows of sources and appends the valid ones to path.
+
+    Returns (imported, rejected) counts. Rejected rows are written to
+    rejects (by default expenses.csv.rejects.csv next to the ledger).
+    """
+    rejects = rejects or rejects_path(path)
+    workers = workers or os.cpu_count() or 1
+    rejected = 0
+    rejects_file = None
+
+    def take(result):
+        nonlocal rejected, rejects_file
+        valid, bad = result
+        appender.write(valid)
+        if bad:
+            if rejects_file is None:
+                rejects_file = open(rejects, mode="w", newline="")
+                csv.writer(rejects_file).writerow(["Source", "Line", "Reason", "Date", "Category", "Amount"])
+            csv.writer(rejects_file).writerows(bad)
+            rejected += len(bad)
+
+    try:
+        with Appender(path) as appender:
+            if workers == 1:
+                for source, chunk in _read_chunks(sources, chunk_size):
+                    take(_check_chunk(source, chunk))
+            else:
+                with ProcessPoolExecutor(workers) as pool:
+                    # Keep a bounded number of chunks in flight, in order
+                    pending = deque()
+                    for source, chunk in _read_chunks(sources, chunk_size):
+                        pending.append(pool.submit(_check_chunk, source, chunk))
+                        if len(pending) >= 2 * workers:
+                            take(pending.popleft().result())
+                    while pending:
+                        take(pending.popleft().result())
+    finally:
+        if rejects_file is not None:
+            rejects_file.close()
+    return appender.count, rejected
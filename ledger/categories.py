@@ -0,0 +1,151 @@
+"""Category dictionary of a ledger: canonical names, aliases and ids.
+
+Categories are free text, so "food", "Food " and "FOOD" turn up in the
+same ledger. expenses.csv.categories maps each of them to one small
+integer id and one canonical name:
+
+    {"names": ["Food", "Transport"], "aliases": {"food": 0, "groceries": 0, "transport": 1},
+     "merges": 0}
+
+A spelling is looked up by its key (stripped and case-folded), so every
+case variant of a known category resolves without an entry of its own.
+A key first stored by a writer becomes a new category, with the spelling
+it arrived in as canonical name. Other words can be made aliases of a
+category with add_alias() (python -m ledger alias).
+
+Writers store rows under the canonical name (register()), and readers
+hand out the canonical name of whatever the file holds (canonical()), so
+totals, reports and lookups never split one category across spellings.
+Readers never write the dictionary: a key it does not hold yet (rows
+from before it existed) goes by the first spelling of it the process
+has seen, and a writer that adds that key later keeps that spelling. "merges" counts the
+aliases that folded one existing category into another; it is part of
+the ledger stamp (see ledger.reader.ledger_stamp), so totals computed
+before a merge are not trusted after it.
+"""
+
+import json
+import os
+
+from ledger.locking import atomic_write, locked
+
+def categories_path(path):
+    return path + ".categories"
+
+def category_key(category):
+    """Normalizes a category so Food, food and ' FOOD ' share one key."""
+    return category.strip().casefold()
+
+class CategoryDictionary:
+    """The canonical names and aliases of one ledger's categories."""
+
+    def __init__(self, path):
+        self.path = path
+        self.stamp = None
+        self.names = []
+        self.ids = {}  # key -> category id
+        self.merges = 0
+        self._spellings = {}  # exact spelling -> canonical name
+        self._unsaved = {}  # key -> name of the keys read but not in the dictionary
+        self.reload()
+
+    def reload(self):
+        """Reads the dictionary file again if it changed on disk."""
+        try:
+            st = os.stat(categories_path(self.path))
+        except FileNotFoundError:
+            return
+        stamp = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if stamp == self.stamp:
+            return
+        try:
+            with open(categories_path(self.path), mode="r") as file:
+                state = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return  # Replaced while reading; the next reload catches up
+        self.names = state["names"]
+        self.ids = state["aliases"]
+        self.merges = state["merges"]
+        self._spellings.clear()
+        self.stamp = stamp
+
+    def _save(self):
+        with atomic_write(categories_path(self.path)) as file:
+            json.dump({"names": self.names, "aliases": self.ids, "merges": self.merges}, file)
+        st = os.stat(categories_path(self.path))
+        self.stamp = (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def lookup(self, name):
+        """Returns the id of a category or alias, or None if unknown."""
+        return self.ids.get(category_key(name))
+
+    def category_id(self, name):
+        """Returns the id of a category, adding it if it is new."""
+        key = category_key(name)
+        category_id = self.ids.get(key)
+        if category_id is None:
+            with locked(categories_path(self.path)):
+                self.reload()  # Another process may have added it
+                category_id = self.ids.get(key)
+                if category_id is None:
+                    category_id = self.ids[key] = len(self.names)
+                    self.names.append(self._unsaved.get(key, name.strip()))
+                    self._save()
+        return category_id
+
+    def canonical(self, name):
+        """Returns the canonical name of a category, without adding it if
+        it is new."""
+        canonical = self._spellings.get(name)
+        if canonical is None:
+            key = category_key(name)
+            category_id = self.ids.get(key)
+            if category_id is None:
+                canonical = self._unsaved.setdefault(key, name.strip())
+            else:
+                canonical = self.names[category_id]
+            self._spellings[name] = canonical
+        return canonical
+
+    def register(self, name):
+        """Returns the canonical name of a category, adding it if it is new."""
+        category_id = self.category_id(name)  # May reload self.names
+        return self.names[category_id]
+
+    def keys_of(self, category_id):
+        """Returns every key that maps to category_id."""
+        return [key for key, known_id in self.ids.items() if known_id == category_id]
+
+    def add_alias(self, alias, name):
+        """Makes alias a spelling of category name; returns the category id.
+
+        An alias that was a category of its own before is folded into
+        name: rows stored under it count as name from now on. So are rows
+        of an alias the dictionary did not know, which readers counted as a
+        category of its own.
+        """
+        category_id = self.category_id(name)
+        with locked(categories_path(self.path)):
+            self.reload()
+            previous = self.ids.get(category_key(alias))
+            if previous != category_id:
+                if previous is not None:  # Fold the whole category, all its aliases too
+                    for key in self.keys_of(previous):
+                        self.ids[key] = category_id
+                self.merges += 1
+                self.ids[category_key(alias)] = category_id
+                self._spellings.clear()
+                self._save()
+        return category_id
+
+# path -> CategoryDictionary, reloaded whenever its file changes
+_dictionaries = {}
+
+def load_categories(path):
+    """Returns the up-to-date CategoryDictionary of the ledger at path."""
+    dictionary = _dictionaries.get(path)
+    if dictionary is None:
+        dictionary = _dictionaries[path] = CategoryDictionary(path)
+    else:
+        dictionary.reload()
+    return dictionary
@@ -0,0 +1,317 @@
+"""Binary columnar storage for a ledger.
+
+A columnar ledger is a directory holding one typed array per column:
+
+    days.i32        day numbers (date.toordinal()) as int32
+    amounts.i64     amounts in integer cents as int64
+    categories.i32  ids into categories.json as int32
+
+Arrays are in the machine's native byte order and are memory-mapped for
+reading, so aggregations walk packed integers instead of parsing text.
+
+Convert an existing CSV ledger with:
+
+    python -m ledger to-columnar expenses.csv
+    python -m ledger to-csv expenses.csv
+"""
+
+import array
+import csv
+import json
+import mmap
+import os
+from datetime import date
+
+from ledger.aggregate import Summary
+from ledger.amounts import format_cents, parse_cents
+from ledger.dates import format_day, parse_day
+from ledger.locking import atomic_write, locked
+from ledger.reader import Expense, iter_expenses as iter_csv_expenses
+from ledger.table import ExpenseTable
+from ledger.validate import check_expense
+
+COLUMNS = (("days.i32", "i"), ("amounts.i64", "q"), ("categories.i32", "i"))
+
+# store path -> (file stamps, Summary) of the last summarize()
+_summaries = {}
+
+def columnar_path(csv_path):
+    """Returns the columnar directory that stands in for csv_path."""
+    return os.path.splitext(csv_path)[0] + ".col"
+
+class ColumnarLedger:
+    """A ledger stored as typed column files in one directory."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._load_categories()
+
+    def _load_categories(self):
+        try:
+            with open(self._file("categories.json"), mode="r") as file:
+                self.categories = json.load(file)
+        except FileNotFoundError:
+            self.categories = []
+        self._category_ids = {name: i for i, name in enumerate(self.categories)}
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _map(self, name, typecode):
+        """Memory-maps one column file as a typed memoryview."""
+        itemsize = array.array(typecode).itemsize
+        try:
+            with open(self._file(name), mode="rb") as file:
+                size = os.fstat(file.fileno()).st_size
+                if size < itemsize:
+                    return memoryview(b"").cast(typecode)
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return memoryview(b"").cast(typecode)
+        # Drop a partly written trailing item, if any
+        return memoryview(mapped)[:size - size % itemsize].cast(typecode)
+
+    def columns(self):
+        """Returns the (days, amounts, categories) arrays, cut to equal length."""
+        views = [self._map(name, typecode) for name, typecode in COLUMNS]
+        rows = min(len(view) for view in views)
+        return tuple(view[:rows] for view in views)
+
+    def __len__(self):
+        return len(self.columns()[0])
+
+    def _category_id(self, name):
+        category_id = self._category_ids.get(name)
+        if category_id is None:
+            category_id = len(self.categories)
+            self.categories.append(name)
+            self._category_ids[name] = category_id
+            with atomic_write(self._file("categories.json")) as file:
+                json.dump(self.categories, file)
+        return category_id
+
+    def _encode(self, rows):
+        encoded = [array.array(typecode) for _, typecode in COLUMNS]
+        days, amounts, categories = encoded
+        for row in rows:
+            days.append(parse_day(row[0]))
+            categories.append(self._category_id(row[1]))
+            amounts.append(parse_cents(row[2]))
+        return encoded
+
+    def _write_columns(self, encoded, mode):
+        for (name, _), values in zip(COLUMNS, encoded):
+            with open(self._file(name), mode=mode) as file:
+                values.tofile(file)
+
+    def _trim_columns(self):
+        """Cuts every column file to the rows all of them hold.
+
+        A crash between the writes of an append leaves some columns longer
+        than others; appending after them would pair the new values with
+        the wrong rows from then on.
+        """
+        lengths = {}
+        for name, typecode in COLUMNS:
+            try:
+                size = os.stat(self._file(name)).st_size
+            except FileNotFoundError:
+                size = 0
+            lengths[name] = (size, array.array(typecode).itemsize)
+        rows = min(size // itemsize for size, itemsize in lengths.values())
+        for name, (size, itemsize) in lengths.items():
+            if size > rows * itemsize:
+                os.truncate(self._file(name), rows * itemsize)
+
+    def append(self, rows):
+        """Appends expense rows given as (date, category, amount) sequences."""
+        with locked(self.path):
+            self._load_categories()  # Another writer may have added some
+            self._trim_columns()
+            self._write_columns(self._encode(rows), "ab")
+
+    def append_checked(self, rows):
+        """Validates every row, then appends them all; see writer.append_expenses."""
+        rows = [[str(value) for value in row] for row in rows]
+        for number, row in enumerate(rows, start=1):
+            problem = check_expense(row)
+            if problem is not None:
+                raise ValueError(f"Row {number}: {problem}")
+        self.append(rows)
+        return len(rows)
+
+    def iter_expenses(self):
+        """Yields the stored expenses as Expense rows."""
+        categories = self.categories
+        for day, amount, category_id in zip(*self.columns()):
+            yield Expense(format_day(day), categories[category_id], format_cents(amount))
+
+    def iter_numbered(self, start=1):
+        """Yields (row number, Expense) from row number start on."""
+        columns = self.columns()
+        for index in range(max(start, 1) - 1, len(columns[0])):
+            yield index + 1, self._row(columns, index)
+
+    def find(self, date=None, category=None):
+        """Returns the ExpenseTable of the rows with this date or category,
+        by row number."""
+        if date is not None:
+            return ExpenseTable((number, expense) for number, expense in self.iter_numbered()
+                                if expense.date == date)
+        category = category.strip().casefold()
+        return ExpenseTable((number, expense) for number, expense in self.iter_numbered()
+                            if expense.category.strip().casefold() == category)
+
+    def find_between(self, start=None, end=None):
+        """Returns the ExpenseTable of the rows dated from start to end
+        (inclusive; None leaves that end open), in date order, by row number."""
+        columns = self.columns()
+        days = columns[0]
+        first = parse_day(start) if start else -1
+        last = parse_day(end) if end else 1 << 31
+        found = sorted((day, index) for index, day in enumerate(days) if first <= day <= last)
+        return ExpenseTable((index + 1, self._row(columns, index)) for _, index in found)
+
+    def _row(self, columns, index):
+        days, amounts, categories = columns
+        return Expense(format_day(days[index]), self.categories[categories[index]],
+                       format_cents(amounts[index]))
+
+    def _stamp(self):
+        """Returns (inode, size, mtime) of every file of the store."""
+        stamp = []
+        for name in [name for name, _ in COLUMNS] + ["categories.json"]:
+            try:
+                st = os.stat(self._file(name))
+            except FileNotFoundError:
+                stamp.append(None)
+            else:
+                stamp.append((st.st_ino, st.st_size, st.st_mtime_ns))
+        return tuple(stamp)
+
+    def summarize(self):
+        """Returns the ledger Summary, computed from the packed arrays and
+        kept in memory until one of the store's files changes."""
+        stamp = self._stamp()
+        cached = _summaries.get(self.path)
+        if cached is None or cached[0] != stamp:
+            self._load_categories()
+            cached = _summaries[self.path] = (stamp, self._summarize())
+        return cached[1].copy()
+
+    def _summarize(self):
+        """Computes the Summary in one pass over the arrays: the rows go into
+        the rollup cube, and the per-category totals are summed from it."""
+        columns = self.columns()
+        _, amounts, _ = columns
+        summary = Summary()
+        if not len(amounts):
+            return summary
+
+        summary.count = len(amounts)
+        summary.total = sum(amounts)
+        highest = max(range(len(amounts)), key=amounts.__getitem__)
+        lowest = min(range(len(amounts)), key=amounts.__getitem__)
+        summary.maximum, summary.max_amount = self._row(columns, highest), amounts[highest]
+        summary.minimum, summary.min_amount = self._row(columns, lowest), amounts[lowest]
+
+        months = {}
+        for day, amount, category_id in zip(*columns):
+            month = months.get(day)
+            if month is None:
+                day_date = date.fromordinal(day)
+                month = months[day] = summary.months.setdefault((day_date.year, day_date.month), {})
+            bucket = month.get(category_id)
+            if bucket is None:
+                month[category_id] = [amount, 1, amount]
+            else:
+                bucket[0] += amount
+                bucket[1] += 1
+                if amount > bucket[2]:
+                    bucket[2] = amount
+
+        totals = [0] * len(self.categories)
+        counts = [0] * len(self.categories)
+        for month, buckets in summary.months.items():
+            for category_id, bucket in buckets.items():
+                totals[category_id] += bucket[0]
+                counts[category_id] += bucket[1]
+            summary.months[month] = {self.categories[category_id]: bucket
+                                     for category_id, bucket in buckets.items()}
+        for category_id, name in enumerate(self.categories):
+            if counts[category_id]:
+                summary.by_category[name] = totals[category_id]
+                summary.category_counts[name] = counts[category_id]
+        return summary
+
+    def delete(self, should_delete):
+        """Rewrites the columns without the rows matching should_delete.
+
+        should_delete is called with the row number (starting at 1) and the
+        Expense. Returns the list of removed rows.
+        """
+        removed = []
+        kept = []
+        with locked(self.path):
+            self._load_categories()
+            for number, expense in enumerate(self.iter_expenses(), start=1):
+                if should_delete(number, expense):
+                    removed.append(expense)
+                else:
+                    kept.append(expense)
+            if removed:
+                encoded = self._encode(kept)
+                for (name, _), values in zip(COLUMNS, encoded):
+                    with atomic_write(self._file(name), mode="wb") as file:
+                        values.tofile(file)
+        return removed
+
+    def delete_found(self, matches, respell=None):
+        """Deletes the (row number, Expense) pairs returned by find().
+
+        Row numbers shift when earlier rows are deleted, so each row is
+        compared with its match first (after respell, if given, which maps
+        a stored Expense to the form matches hold). If another session
+        changed the rows since the lookup, nothing is deleted and
+        ValueError is raised.
+        """
+        wanted = dict(matches)
+        with locked(self.path):
+            self._load_categories()
+            columns = self.columns()
+            for number, expense in wanted.items():
+                current = self._row(columns, number - 1) if 1 <= number <= len(columns[0]) else None
+                if current is not None and respell is not None:
+                    current = respell(current)
+                if current != expense:
+                    raise ValueError("The ledger changed since these rows were read; look them up again")
+            self.delete(lambda number, expense: number in wanted)
+
+    def delete_row(self, number):
+        """Deletes the row with this number; returns it, or None if out of range."""
+        removed = self.delete(lambda i, expense: i == number)
+        return removed[0] if removed else None
+
+def import_csv(csv_path, store_path=None, batch_size=65536):
+    """Replaces the columnar ledger with the rows of a Date,Category,Amount CSV."""
+    store = ColumnarLedger(store_path or columnar_path(csv_path))
+    with locked(store.path):
+        mode = "wb"
+        batch = []
+        for expense in iter_csv_expenses(csv_path):
+            batch.append(expense)
+            if len(batch) >= batch_size:
+                store._write_columns(store._encode(batch), mode)
+                mode, batch = "ab", []
+        store._write_columns(store._encode(batch), mode)
+    return store
+
+def export_csv(csv_path, store_path=None):
+    """Writes the columnar ledger back out as a Date,Category,Amount CSV."""
+    store = ColumnarLedger(store_path or columnar_path(csv_path))
+    with locked(csv_path), atomic_write(csv_path, newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Date", "Category", "Amount"])
+        writer.writerows(store.iter_expenses())
+    return store
@@ -0,0 +1,108 @@
+"""Consolidation of the per-person ledgers (*/expenses.csv) into one.
+
+Every ledger is scanned in a process pool: the worker totals it per
+category and writes its rows as date-sorted run files of at most
+RUN_SIZE rows. The runs of all ledgers are then combined with a
+streaming k-way merge (heapq.merge), so memory use grows with the
+number of runs, not the number of rows.
+
+    python -m ledger consolidate --output all-expenses.csv
+"""
+
+import csv
+import glob
+import heapq
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from ledger.amounts import format_cents, parse_cents
+from ledger.categories import category_key
+from ledger.dates import format_day, parse_day
+from ledger.reader import iter_expenses
+
+RUN_SIZE = 500_000
+
+def find_ledgers(root="."):
+    """Returns {user: path} for every <user>/expenses.csv under root."""
+    paths = sorted(glob.glob(os.path.join(root, "*", "expenses.csv")))
+    return {os.path.basename(os.path.dirname(path)): path for path in paths}
+
+def _write_run(rows, run_dir, user, number):
+    rows.sort(key=lambda row: row[0])  # Stable, so same-day rows keep file order
+    path = os.path.join(run_dir, f"{user}.{number}.run")
+    with open(path, mode="w", newline="") as file:
+        csv.writer(file).writerows(rows)
+    return path
+
+def _scan_ledger(user, path, run_dir, run_size):
+    """Totals one ledger and splits it into date-sorted runs.
+
+    Returns (user, {category: [cents, count]}, run paths, skipped rows).
+    """
+    totals = {}
+    runs = []
+    rows = []
+    skipped = 0
+    for expense in iter_expenses(path):
+        try:
+            day = parse_day(expense.date)
+            cents = parse_cents(expense.amount)
+        except ValueError:
+            skipped += 1
+            continue
+        total = totals.setdefault(expense.category, [0, 0])
+        total[0] += cents
+        total[1] += 1
+        rows.append((day, cents, expense.category))
+        if len(rows) >= run_size:
+            runs.append(_write_run(rows, run_dir, user, len(runs)))
+            rows = []
+    if rows:
+        runs.append(_write_run(rows, run_dir, user, len(runs)))
+    return user, totals, runs, skipped
+
+def _read_run(path, user):
+    with open(path, mode="r", newline="") as file:
+        for day, cents, category in csv.reader(file):
+            yield int(day), user, category, int(cents)
+
+def consolidate(root=".", output=None, workers=None, run_size=RUN_SIZE):
+    """Merges every <user>/expenses.csv under root.
+
+    Writes the merged rows, ordered by date, to output as
+    Date,User,Category,Amount (when output is given) and returns a dict
+    with per-user and per-category totals in cents. Every spelling of a
+    category (Food, food) counts under the first one met.
+    """
+    ledgers = find_ledgers(root)
+    users = {}
+    categories = {}
+    names = {}  # category key -> the name it is totalled under
+    merged = skipped = 0
+    with tempfile.TemporaryDirectory() as run_dir, ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(_scan_ledger, user, path, run_dir, run_size)
+                   for user, path in ledgers.items()]
+        runs = []
+        for future in futures:
+            user, totals, user_runs, user_skipped = future.result()
+            users[user] = {
+                "count": sum(count for _, count in totals.values()),
+                "total": sum(cents for cents, _ in totals.values()),
+                "by_category": {category: cents for category, (cents, _) in totals.items()},
+            }
+            for category, (cents, _) in totals.items():
+                name = names.setdefault(category_key(category), category)
+                categories[name] = categories.get(name, 0) + cents
+            runs.extend(_read_run(run, user) for run in user_runs)
+            skipped += user_skipped
+
+        if output is not None:
+            with open(output, mode="w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(["Date", "User", "Category", "Amount"])
+                for day, user, category, cents in heapq.merge(*runs, key=lambda row: row[0]):
+                    writer.writerow([format_day(day), user, category, format_cents(cents)])
+                    merged += 1
+
+    return {"users": users, "categories": categories, "merged": merged, "skipped": skipped}
@@ -0,0 +1,165 @@
+"""Date-sorted index of a CSV ledger, for date-range queries.
+
+expenses.csv.bydate holds the day number (date.toordinal()) of every
+expense row in ascending order, then the row id of each, behind a header
+like the offset index's: the CSV inode, the indexed size, the CRC32 of the
+last indexed bytes and the number of rows covered (rows without a valid
+date are covered but have no entry). A range query bisects the sorted
+days for its bounds and reads only the rows in between, each with one
+seek through the offset index.
+
+Rows appended since the index was sorted, in any date order, form an
+unsorted delta: their dates are read from the new rows alone and
+filtered one by one. Once the delta holds DELTA_SHARE of the sorted rows
+(and at least DELTA_MIN rows) it is sorted and merged in. Any other
+change to the CSV file rebuilds the index.
+
+The sorted arrays and the delta stay in memory between queries, so a
+query after an append reads only the appended rows.
+"""
+
+import array
+import csv
+import heapq
+import io
+import os
+import struct
+from bisect import bisect_left, bisect_right
+
+from ledger.dates import parse_day
+from ledger.locking import atomic_write, locked
+from ledger.rowindex import RowIndex, tail_crc
+from ledger.table import ExpenseTable
+from ledger.tombstones import load_deleted
+
+HEADER = struct.Struct("=4q")
+DELTA_MIN = 4096
+DELTA_SHARE = 0.05
+
+# path -> (.bydate stamp, header, days, row ids) of the last load
+_loaded = {}
+# path -> (header, rows read, CSV bytes read, CRC32 of their tail, delta)
+_deltas = {}
+
+def _file_stamp(path):
+    st = os.stat(path)
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+def bydate_path(path):
+    return path + ".bydate"
+
+class DateIndex:
+    """Row ids of a CSV ledger ordered by date, plus the unsorted delta."""
+
+    def __init__(self, path):
+        self.path = path
+        with locked(path):
+            self.rows = RowIndex(path)
+            self.refresh()
+
+    def _load(self):
+        """Returns (header, days, row ids) of the saved index, or None."""
+        try:
+            with open(bydate_path(self.path), mode="rb") as file:
+                stamp = os.fstat(file.fileno())
+                stamp = (stamp.st_ino, stamp.st_size, stamp.st_mtime_ns)
+                cached = _loaded.get(self.path)
+                if cached is not None and cached[0] == stamp:
+                    return cached[1:]
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < HEADER.size:
+            return None
+        header = HEADER.unpack_from(data)
+        days = array.array("i")
+        row_ids = array.array("q")
+        count, extra = divmod(len(data) - HEADER.size, days.itemsize + row_ids.itemsize)
+        if extra:
+            return None
+        days.frombytes(data[HEADER.size:HEADER.size + count * days.itemsize])
+        row_ids.frombytes(data[HEADER.size + count * days.itemsize:])
+        _loaded[self.path] = (stamp, header, days, row_ids)
+        return header, days, row_ids
+
+    def refresh(self):
+        """Reads the delta, and sorts it into the index once it is large."""
+        saved = self._load()
+        with open(self.path, mode="rb") as csv_file:
+            st = os.fstat(csv_file.fileno())
+            if (saved is not None and saved[0][0] == st.st_ino and saved[0][1] <= st.st_size
+                    and saved[0][2] == tail_crc(csv_file, saved[0][1])):
+                header, self.days, self.row_ids = saved
+                covered = read = header[3]
+                delta = []
+                cached = _deltas.get(self.path)
+                if (cached is not None and cached[0] == header and cached[1] <= self.rows.count
+                        and cached[2] <= st.st_size and cached[3] == tail_crc(csv_file, cached[2])):
+                    _, read, _, _, delta = cached
+            else:
+                self.days, self.row_ids = array.array("i"), array.array("q")
+                covered = read = 0
+                header, delta, saved = None, [], None
+            delta = delta + self._read_delta(csv_file, read)
+            crc = tail_crc(csv_file, self.rows.size)
+
+        if saved is None or len(delta) >= max(DELTA_MIN, covered * DELTA_SHARE):
+            header = self._merge(delta)
+            delta = []
+        self.delta = sorted(delta)
+        _deltas[self.path] = (header, self.rows.count, self.rows.size, crc, self.delta)
+
+    def _read_delta(self, csv_file, count):
+        """Returns [(day, row id)] of the indexed rows after row id count."""
+        if count >= self.rows.count:
+            return []
+        csv_file.seek(self.rows.offset(count + 1))
+        data = csv_file.read(self.rows.size - csv_file.tell())
+        delta = []
+        row_id = count
+        for row in csv.reader(io.StringIO(data.decode(), newline="")):
+            if len(row) < 3:  # Blank or truncated line
+                continue
+            row_id += 1
+            try:
+                delta.append((parse_day(row[0]), row_id))
+            except ValueError:
+                pass  # No valid date, so in no range
+        return delta
+
+    def _merge(self, delta):
+        """Sorts delta into the index and saves it; returns the new header."""
+        pairs = list(heapq.merge(zip(self.days, self.row_ids), sorted(delta)))
+        self.days = array.array("i", (day for day, _ in pairs))
+        self.row_ids = array.array("q", (row_id for _, row_id in pairs))
+        with open(self.path, mode="rb") as csv_file:
+            header = (os.fstat(csv_file.fileno()).st_ino, self.rows.size,
+                      tail_crc(csv_file, self.rows.size), self.rows.count)
+        with atomic_write(bydate_path(self.path), mode="wb", durable=False) as file:
+            file.write(HEADER.pack(*header))
+            self.days.tofile(file)
+            self.row_ids.tofile(file)
+        _loaded[self.path] = (_file_stamp(bydate_path(self.path)), header, self.days, self.row_ids)
+        return header
+
+    def row_ids_between(self, first=None, last=None):
+        """Returns the row ids dated from day first to day last (inclusive;
+        None leaves that end open), in date order."""
+        lo = 0 if first is None else bisect_left(self.days, first)
+        hi = len(self.days) if last is None else bisect_right(self.days, last)
+        delta = [(day, row_id) for day, row_id in self.delta
+                 if (first is None or day >= first) and (last is None or day <= last)]
+        return [row_id for _, row_id in heapq.merge(zip(self.days[lo:hi], self.row_ids[lo:hi]), delta)]
+
+def expenses_between(path, start=None, end=None):
+    """Returns the ExpenseTable of the live rows dated from start to end.
+
+    start and end are YYYY-MM-DD dates, both included; None leaves that
+    end of the range open. Rows come in date order.
+    """
+    index = DateIndex(path)
+    first = parse_day(start) if start else None
+    last = parse_day(end) if end else None
+    deleted = load_deleted(path)
+    row_ids = [row_id for row_id in index.row_ids_between(first, last) if row_id not in deleted]
+    return ExpenseTable(index.rows.read_rows(row_ids))
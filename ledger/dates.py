@@ -0,0 +1,80 @@
+"""Fast YYYY-MM-DD parsing into integer day numbers.
+
+A day number is date.toordinal(): 2024-01-01 is 738886, and consecutive
+days are consecutive integers. Strict ISO dates are split by slicing; the
+non-padded dates already found in the ledgers (2025-12-3, 2024-4-12) go
+through one precompiled regex. Ledgers repeat a small set of dates, so
+parsed values are memoized.
+"""
+
+import array
+import re
+from datetime import date, timedelta
+
+_LOOSE = re.compile(r"([0-9]{4})-([0-9]{1,2})-([0-9]{1,2})")
+
+# Parsed dates kept for reuse; bounded so hostile input cannot grow it forever
+_MEMO_SIZE = 1 << 16
+_memo = {}
+
+def _parse(text):
+    if (len(text) == 10 and text[4] == "-" and text[7] == "-" and text.isascii()
+            and text[:4].isdigit() and text[5:7].isdigit() and text[8:].isdigit()):
+        year, month, day = int(text[:4]), int(text[5:7]), int(text[8:])
+    else:
+        match = _LOOSE.fullmatch(text)
+        if match is None:
+            raise ValueError(f"invalid date {text!r}, expected YYYY-MM-DD")
+        year, month, day = int(match[1]), int(match[2]), int(match[3])
+    try:
+        return date(year, month, day).toordinal()
+    except ValueError:
+        raise ValueError(f"invalid date {text!r}, expected YYYY-MM-DD") from None
+
+def parse_day(text):
+    """Returns the day number of a YYYY-MM-DD date; raises ValueError if invalid."""
+    day = _memo.get(text)
+    if day is None:
+        day = _parse(text)
+        if len(_memo) < _MEMO_SIZE:
+            _memo[text] = day
+    return day
+
+_months = {}
+
+def parse_month(text):
+    """Returns (year, month) of a YYYY-MM-DD date; raises ValueError if invalid."""
+    month = _months.get(text)
+    if month is None:
+        day = date.fromordinal(parse_day(text))
+        month = (day.year, day.month)
+        if len(_months) < _MEMO_SIZE:
+            _months[text] = month
+    return month
+
+def month_bounds(year, month):
+    """Returns the first and last YYYY-MM-DD dates of a month."""
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return f"{year:04d}-{month:02d}-01", last.isoformat()
+
+def parse_days(texts):
+    """Parses many dates into an array('i') of day numbers."""
+    return array.array("i", map(parse_day, texts))
+
+def is_valid_date(text):
+    try:
+        parse_day(text)
+        return True
+    except ValueError:
+        return False
+
+_formatted = {}
+
+def format_day(day):
+    """Returns the YYYY-MM-DD form of a day number."""
+    text = _formatted.get(day)
+    if text is None:
+        text = date.fromordinal(day).isoformat()
+        if len(_formatted) < _MEMO_SIZE:
+            _formatted[day] = text
+    return text
@@ -0,0 +1,203 @@
+"""Secondary indexes from date and from category to row ids.
+
+expenses.csv.keys is an append-only postings file mapping "d:<date>" and
+"c:<normalized category>" to the ids of the rows holding that key
+(deleted rows included; readers filter them with the deletion log). It
+starts with a header like the offset index's (the CSV inode, indexed
+size, CRC of the last indexed bytes and row count, plus where the
+postings end), followed by records of
+
+    key length and row count as uint32, the key as UTF-8, the row ids as int64
+
+A key's rows are the concatenation of all its records. The index is
+brought up to date when it is queried, not when rows are appended: rows
+added since are read and appended as new records, and the header is
+written last, so a refresh cut short is redone. Any other change to the
+CSV file rebuilds the index, and once the records outnumber the keys
+REWRITE_FACTOR times over the file is rewritten with one record a key.
+
+The postings stay in memory between queries; only records appended by
+other processes are read again.
+"""
+
+import array
+import csv
+import io
+import os
+import struct
+
+from ledger.categories import category_key, load_categories
+from ledger.locking import atomic_write, locked
+from ledger.rowindex import RowIndex, tail_crc
+from ledger.table import ExpenseTable
+from ledger.tombstones import load_deleted
+
+HEADER = struct.Struct("=5q")
+RECORD = struct.Struct("=2I")
+ROW_ID = array.array("q").itemsize
+REWRITE_FACTOR = 4
+
+# path -> [header, {key: array of row ids}, records read, .keys inode]
+_loaded = {}
+
+def keys_path(path):
+    return path + ".keys"
+
+def _read_header(file):
+    data = file.read(HEADER.size)
+    return HEADER.unpack(data) if len(data) == HEADER.size else None
+
+def _read_records(file, start, end, postings):
+    """Adds the records between byte start and end to postings; returns
+    how many there were."""
+    file.seek(start)
+    data = file.read(end - start)
+    pos = count = 0
+    while pos + RECORD.size <= len(data):
+        key_size, rows = RECORD.unpack_from(data, pos)
+        pos += RECORD.size
+        key = data[pos:pos + key_size].decode()
+        pos += key_size
+        row_ids = postings.get(key)
+        if row_ids is None:
+            row_ids = postings[key] = array.array("q")
+        row_ids.frombytes(data[pos:pos + rows * ROW_ID])
+        pos += rows * ROW_ID
+        count += 1
+    return count
+
+def _records(postings):
+    """Returns postings encoded as records."""
+    out = io.BytesIO()
+    for key, row_ids in postings.items():
+        key = key.encode()
+        out.write(RECORD.pack(len(key), len(row_ids)))
+        out.write(key)
+        row_ids.tofile(out)
+    return out.getvalue()
+
+class KeyIndex:
+    """The date and category indexes of one CSV ledger."""
+
+    def __init__(self, path):
+        self.path = path
+        with locked(path):
+            self.refresh()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        pass
+
+    def _load(self, csv_file, st):
+        """Returns the loaded [header, postings, records, inode] if the
+        saved index covers a prefix of the CSV file, else None."""
+        try:
+            with open(keys_path(self.path), mode="rb") as file:
+                header = _read_header(file)
+                if (header is None or header[0] != st.st_ino or header[1] > st.st_size
+                        or header[2] != tail_crc(csv_file, header[1])):
+                    return None
+                inode = os.fstat(file.fileno()).st_ino
+                loaded = _loaded.get(self.path)
+                if loaded is not None and loaded[3] == inode and loaded[0][0] == header[0]:
+                    if loaded[0][4] < header[4]:
+                        # Another process indexed more rows; read just its records
+                        loaded[2] += _read_records(file, loaded[0][4], header[4], loaded[1])
+                        loaded[0] = header
+                    if loaded[0] == header:
+                        return loaded
+                postings = {}
+                records = _read_records(file, HEADER.size, header[4], postings)
+        except FileNotFoundError:
+            return None
+        loaded = _loaded[self.path] = [header, postings, records, inode]
+        return loaded
+
+    def refresh(self):
+        """Indexes the rows added since the last refresh, or rebuilds."""
+        with open(self.path, mode="rb") as csv_file:
+            st = os.fstat(csv_file.fileno())
+            loaded = self._load(csv_file, st)
+            if loaded is None:
+                loaded = [None, {}, 0, None]
+                start = row_id = 0
+            else:
+                _, start, _, row_id, _ = loaded[0]
+                if start == st.st_size:
+                    self.postings = loaded[1]
+                    return
+
+            csv_file.seek(start)
+            text = io.TextIOWrapper(csv_file, newline="")
+            reader = csv.reader(text)
+            if not start:
+                next(reader, None)  # Skip header
+            new = {}
+            for row in reader:
+                if len(row) < 3:  # Blank or truncated line
+                    continue
+                row_id += 1
+                for key in ("d:" + row[0], "c:" + category_key(row[1])):
+                    row_ids = new.get(key)
+                    if row_ids is None:
+                        row_ids = new[key] = array.array("q")
+                    row_ids.append(row_id)
+            end = text.detach().seek(0, os.SEEK_END)
+            crc = tail_crc(csv_file, end)
+
+        _loaded.pop(self.path, None)  # Until the file matches it again
+        header, postings, records, _ = loaded
+        for key, row_ids in new.items():
+            known = postings.get(key)
+            if known is None:
+                postings[key] = row_ids
+            else:
+                known.extend(row_ids)
+        records += len(new)
+        if header is None or records > REWRITE_FACTOR * len(postings):
+            data = _records(postings)
+            header = (st.st_ino, end, crc, row_id, HEADER.size + len(data))
+            with atomic_write(keys_path(self.path), mode="wb", durable=False) as file:
+                file.write(HEADER.pack(*header))
+                file.write(data)
+            records = len(postings)
+        else:
+            data = _records(new)
+            with open(keys_path(self.path), mode="r+b") as file:
+                # Drop whatever a refresh cut short left after the postings
+                file.truncate(header[4])
+                file.seek(header[4])
+                file.write(data)
+                header = (st.st_ino, end, crc, row_id, header[4] + len(data))
+                file.seek(0)
+                file.write(HEADER.pack(*header))
+        _loaded[self.path] = [header, postings, records, os.stat(keys_path(self.path)).st_ino]
+        self.postings = postings
+
+    def lookup(self, kind, value):
+        """Returns the row ids with this date (kind "d") or category ("c")."""
+        if kind == "c":
+            value = category_key(value)
+        return self.postings.get(f"{kind}:{value}", array.array("q"))
+
+def find_expenses(path, date=None, category=None):
+    """Returns the ExpenseTable of the live rows with this date or category.
+
+    Only the matching rows are read from the CSV file, each with one seek.
+    Categories match case-insensitively, and through their aliases.
+    """
+    with KeyIndex(path) as index:
+        if date is not None:
+            row_ids = index.lookup("d", date)
+        else:
+            categories = load_categories(path)
+            category_id = categories.lookup(category)
+            keys = [category] if category_id is None else categories.keys_of(category_id)
+            row_ids = sorted(row_id for key in keys for row_id in index.lookup("c", key))
+    deleted = load_deleted(path)
+    return ExpenseTable(RowIndex(path).read_rows(row_id for row_id in row_ids if row_id not in deleted))
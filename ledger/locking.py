@@ -0,0 +1,95 @@
+"""Advisory locking and atomic rewrites for ledger files.
+
+Every change to a ledger and its side files (deletion log, indexes,
+running totals) happens while holding an exclusive flock() on
+<path>.lock, taken only around the write itself. Readers take no lock:
+appends only ever add whole rows, and rewrites go to a temporary file
+that replaces the original with os.replace(), so a reader sees either
+the old file or the new one, never a torn one.
+
+Where fcntl is not available (Windows), only threads of one process are
+kept apart.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# path -> [RLock, depth]; the flock is taken by the outermost holder only
+_locks = {}
+_locks_guard = threading.Lock()
+
+def lock_path(path):
+    return path + ".lock"
+
+@contextmanager
+def locked(path):
+    """Holds the exclusive write lock of the ledger at path.
+
+    Re-entrant within a thread, so a locked operation may call another.
+    """
+    with _locks_guard:
+        entry = _locks.setdefault(path, [threading.RLock(), 0])
+    with entry[0]:
+        if entry[1]:
+            entry[1] += 1
+            try:
+                yield
+            finally:
+                entry[1] -= 1
+            return
+
+        fd = os.open(lock_path(path), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            entry[1] = 1
+            try:
+                yield
+            finally:
+                entry[1] = 0
+        finally:
+            os.close(fd)  # Releases the flock
+
+@contextmanager
+def atomic_write(path, mode="w", newline=None, durable=True):
+    """Yields a file whose contents replace path once the block succeeds.
+
+    The data is written to a temporary file next to path and renamed over
+    it, so a crash leaves either the old file or the new one. If durable,
+    the data and the rename are fsynced before returning.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, mode=mode, newline=newline) as file:
+            yield file
+            if durable:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    if durable:
+        _fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+def _fsync_dir(directory):
+    """Makes a rename in directory durable, where the OS allows it."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,78 @@
+"""Page-at-a-time viewer for the trackers' view_expenses.
+
+Only the rows of the page on screen are read: iter_numbered() seeks
+straight to the first of them through the row index (or the columnar or
+SQLite store), and the row count comes from the running totals. A date
+range reads just the rows in it, through the date index. Each page is
+built into one string and written with one call.
+"""
+
+import sys
+from itertools import islice
+
+from ledger.storage import find_between, iter_numbered, summarize
+
+# Rows per page unless the tracker asks for another size
+PAGE_SIZE = 20
+
+def read_page(path, page, page_size=PAGE_SIZE, storage="csv"):
+    """Returns [(row number, Expense)] on page (counting from 1)."""
+    start = (page - 1) * page_size + 1
+    return list(islice(iter_numbered(path, start, storage), page_size))
+
+def render_page(rows, format_row, header="", footer=""):
+    """Builds the text of a page; format_row(number, expense) returns one line."""
+    lines = [header] if header else []
+    lines.extend(format_row(number, expense) for number, expense in rows)
+    if footer:
+        lines.append(footer)
+    lines.append("")
+    return "\n".join(lines)
+
+def browse(path, format_row, header="", footer="", storage="csv", page_size=PAGE_SIZE,
+           start=None, end=None):
+    """Shows the ledger page by page until the user quits.
+
+    Between pages the user can go to the next or previous page or jump to
+    any page. With start or end (YYYY-MM-DD, inclusive), only the rows in
+    that date range are shown, in date order and numbered from 1. Returns
+    the number of rows shown; nothing is shown when it is 0.
+    """
+    if start or end:
+        found = find_between(path, start, end, storage)
+        total = len(found)
+    else:
+        found = None
+        total = summarize(path, storage).row_count
+    pages = -(-total // page_size)
+    page = 1
+    while total:
+        if found is None:
+            rows = read_page(path, page, page_size, storage)
+        else:
+            first = (page - 1) * page_size
+            rows = [(first + i + 1, found.expense(first + i))
+                    for i in range(min(page_size, total - first))]
+        sys.stdout.write(render_page(rows, format_row, header, footer)
+                         + f"Page {page} of {pages} ({total} expense(s))\n")
+        sys.stdout.flush()
+        if pages == 1:
+            break
+        command = input("[n]ext, [p]revious, [j]ump to page, [q]uit: ").strip().lower()
+        if command in ("", "n"):
+            if page == pages:
+                break
+            page += 1
+        elif command == "p":
+            page = max(page - 1, 1)
+        elif command.startswith("j"):
+            target = command[1:].strip() or input(f"Page (1-{pages}): ").strip()
+            if target.isdigit() and 1 <= int(target) <= pages:
+                page = int(target)
+            else:
+                print(f"❌ Invalid page. Please enter a number from 1 to {pages}.")
+        elif command == "q":
+            break
+        else:
+            print("❌ Invalid choice. Try again.")
+    return total
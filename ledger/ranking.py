@@ -0,0 +1,115 @@
+"""Most and least expensive expenses: overall, per category and per month.
+
+The rollup of a Summary keeps bounded heaps of the RANKED most and least
+expensive rows of each category and each month (see
+Summary.ranked_by_category). They are saved with the month cube, apart
+from the running totals, and brought up to date with the rows appended
+since when a ranking needs them. For k up to RANKED, a CSV ledger is
+then ranked by merging those heaps, not reading every row; the overall
+ranking is the best k of the per-category ones. The only exception is a
+deleted row that was in a full heap: that heap is then unknown, and the
+report reads that one category or month again, as ledger/rollup.py does
+for its maxima.
+
+SQLite ledgers rank with ORDER BY amount ... LIMIT queries. Otherwise,
+and for a larger k, the rows are ranked in one streaming pass through
+bounded heaps, so memory grows with k and the number of groups, never
+with the ledger. Among equal amounts, the later date ranks first.
+"""
+
+import heapq
+from itertools import chain
+
+from ledger import storage as storages
+from ledger.aggregate import RANKED, keep_ranked, refill_ranked
+from ledger.amounts import parse_cents
+from ledger.categories import load_categories
+from ledger.dates import month_bounds, parse_month
+from ledger.sqlstore import open_sqlite, sqlite_path
+
+GROUPINGS = ("category", "month")
+
+def _entries(expenses, cheapest):
+    """Yields the heap entries of rows, the largest ranking first; rows
+    whose amount does not parse are left out, as in Summary."""
+    for expense in expenses:
+        try:
+            cents = parse_cents(expense.amount)
+        except ValueError:
+            continue
+        yield (-cents if cheapest else cents), expense
+
+def _from_summary(path, k, by, cheapest):
+    """Returns {group: entries} from the heaps of the CSV ledger's Summary,
+    refilling those that deletions left unknown."""
+    side = 1 if cheapest else 0
+    summary = storages.summarize(path, rollup=True)
+    ranked = summary.ranked_by_month if by == "month" else summary.ranked_by_category
+    for group, heaps in ranked.items():
+        if heaps[side] is None:
+            if by == "month":
+                rows = storages.find_between(path, *month_bounds(*group))
+            else:
+                rows = storages.find_expenses(path, category=group)
+            refill_ranked(heaps, side, _entries(rows.expenses(), cheapest))
+    return {group: heaps[side] for group, heaps in ranked.items()}
+
+def _from_sqlite(path, k, by, cheapest):
+    canonical = load_categories(path).canonical
+    found = {}
+    for group, expense in open_sqlite(sqlite_path(path)).ranked(k, by, cheapest):
+        expense = expense._replace(category=canonical(expense.category))
+        if by == "category":
+            group = expense.category  # Spellings of one category rank together
+        elif by == "month":
+            group = tuple(map(int, group.split("-")))
+        found.setdefault(group, []).append(expense)
+    return {group: list(_entries(expenses, cheapest)) for group, expenses in found.items()}
+
+def _stream(expenses, k, by, cheapest):
+    """Ranks the rows in one pass; returns {group: entries}."""
+    heaps = {}
+    for entry in _entries(expenses, cheapest):
+        expense = entry[1]
+        if by == "month":
+            try:
+                group = parse_month(expense.date)
+            except ValueError:
+                continue  # No month to file it under
+        else:
+            group = expense.category if by == "category" else None
+        heap = heaps.get(group)
+        if heap is None:
+            heap = heaps[group] = []
+        keep_ranked(heap, entry, k)
+    return heaps
+
+def _ranked(path, k, by, cheapest, storage):
+    if storage == "sqlite":
+        return _from_sqlite(path, k, by, cheapest)
+    if storage == "csv" and k <= RANKED:
+        return _from_summary(path, k, by, cheapest)
+    return _stream(storages.iter_expenses(path, storage), k, by, cheapest)
+
+def _ordered(entries, k):
+    return [expense for _, expense in heapq.nlargest(k, entries)]
+
+def top_expenses(path, k=RANKED, by=None, cheapest=False, storage="csv"):
+    """Returns the k most expensive expenses, most expensive first, or with
+    cheapest=True the k cheapest, cheapest first.
+
+    by="category" or "month" ranks each category or month apart and
+    returns {category or "YYYY-MM": [Expense, ...]}, in name or month
+    order; by=None returns the list for the whole ledger.
+    """
+    if by is not None and by not in GROUPINGS:
+        raise ValueError(f"Unknown grouping {by!r}, expected one of {GROUPINGS}")
+    if k < 0:
+        raise ValueError("k must not be negative")
+    groups = _ranked(path, k, by, cheapest, storage) if k else {}
+    if by is None:
+        return _ordered(chain.from_iterable(groups.values()), k)
+    if by == "month":
+        return {f"{year:04d}-{month:02d}": _ordered(groups[(year, month)], k)
+                for year, month in sorted(groups)}
+    return {category: _ordered(groups[category], k) for category in sorted(groups)}
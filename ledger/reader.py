@@ -0,0 +1,49 @@
+import csv
+import os
+from collections import namedtuple
+
+from ledger.categories import load_categories
+from ledger.tombstones import deleted_path, load_deleted
+
+# One row of expenses.csv. Index access (row[0], row[1], row[2]) still works.
+Expense = namedtuple("Expense", ["date", "category", "amount"])
+
+def iter_rows(path):
+    """Yields (row id, Expense) for every live expense in the CSV file.
+
+    Row ids count the expense rows of the file from 1, including deleted
+    ones, so they stay stable until the file is compacted. Categories come
+    in their canonical spelling (see ledger/categories.py).
+    """
+    deleted = load_deleted(path)
+    canonical = load_categories(path).canonical
+    with open(path, mode="r", newline="") as file:
+        reader = csv.reader(file)
+        next(reader, None)  # Skip header
+        row_id = 0
+        for row in reader:
+            if len(row) < 3:  # Blank or truncated line
+                continue
+            row_id += 1
+            if row_id in deleted:
+                continue
+            yield row_id, Expense(row[0], canonical(row[1]), row[2])
+
+def iter_expenses(path):
+    """Yields the expenses stored in the CSV file one row at a time."""
+    for _, expense in iter_rows(path):
+        yield expense
+
+def file_stamp(path):
+    """Returns a value that changes whenever the file at path is modified."""
+    st = os.stat(path)
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+def ledger_stamp(path):
+    """Like file_stamp, but also changes when rows are marked deleted or
+    categories are merged."""
+    try:
+        deleted_size = os.stat(deleted_path(path)).st_size
+    except FileNotFoundError:
+        deleted_size = 0
+    return file_stamp(path) + (deleted_size, load_categories(path).merges)
@@ -0,0 +1,70 @@
+"""Monthly and yearly reports from the rollup cube.
+
+The Summary of a ledger can carry a cube of (year, month, category)
+buckets holding the total, count and largest amount of their rows (see
+Summary.months). Deletions take rows back out of it. Appends only go into
+the running totals, so the cube is saved apart from them, with the heaps
+of ledger/ranking.py, and a report first folds in the rows appended
+since it was last saved; then it walks the buckets, not the rows. The
+only exception is a deleted row that was its bucket's largest: the
+bucket's max is then unknown, and the report reads that one month again,
+through the date index.
+"""
+
+from ledger.amounts import parse_cents
+from ledger.dates import month_bounds
+from ledger.storage import find_between, summarize
+
+PERIODS = ("month", "year")
+
+def _period_key(year, month, period):
+    return f"{year:04d}" if period == "year" else f"{year:04d}-{month:02d}"
+
+def rollup(summary, period="month", start=None, end=None):
+    """Folds the buckets of summary into {period: {category: [total, count, max]}}.
+
+    period is "month" (keys "YYYY-MM") or "year" (keys "YYYY"); start and
+    end are "YYYY-MM" months, both included, or None for an open end.
+    Periods come in chronological order.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period {period!r}, expected one of {PERIODS}")
+    first = tuple(map(int, start.split("-"))) if start else None
+    last = tuple(map(int, end.split("-"))) if end else None
+    report = {}
+    for (year, month) in sorted(summary.months):
+        if (first is not None and (year, month) < first) or (last is not None and (year, month) > last):
+            continue
+        totals = report.setdefault(_period_key(year, month, period), {})
+        for category, (total, count, highest) in summary.months[(year, month)].items():
+            bucket = totals.get(category)
+            if bucket is None:
+                totals[category] = [total, count, highest]
+            else:
+                bucket[0] += total
+                bucket[1] += count
+                bucket[2] = max(bucket[2], highest)
+    return report
+
+def _repair(path, summary, storage):
+    """Recomputes the bucket maxima that deletions left unknown."""
+    for (year, month), buckets in summary.months.items():
+        stale = {category for category, bucket in buckets.items() if bucket[2] is None}
+        if not stale:
+            continue
+        highest = {}
+        for _, expense in find_between(path, *month_bounds(year, month), storage):
+            if expense.category in stale:
+                try:
+                    amount = parse_cents(expense.amount)
+                except ValueError:
+                    continue  # Not in the totals either
+                highest[expense.category] = max(highest.get(expense.category, amount), amount)
+        for category in stale:
+            buckets[category][2] = highest.get(category)
+
+def report(path, period="month", start=None, end=None, storage="csv"):
+    """Returns rollup() of the ledger, in time proportional to its buckets."""
+    summary = summarize(path, storage, rollup=True)
+    _repair(path, summary, storage)
+    return rollup(summary, period, start, end)
@@ -0,0 +1,222 @@
+"""Byte-offset index of the expense rows of a CSV ledger.
+
+expenses.csv.offsets starts with four int64 values (the CSV file's inode,
+how many of its bytes are indexed, the CRC32 of the last indexed bytes,
+and the row count), followed by the byte offset of every expense row.
+Row id k is found with a single seek. Rows appended since the last
+refresh are indexed by scanning only the new bytes; any other change to
+the CSV file rebuilds the index from scratch.
+
+Rows read by id stay parsed in memory (up to ROW_CACHE_SIZE of them), so
+asking for them again reads nothing, until the CSV file is rewritten or
+categories are merged.
+"""
+
+import array
+import csv
+import io
+import os
+import struct
+import zlib
+from itertools import islice
+
+from ledger.categories import load_categories
+from ledger.locking import locked
+from ledger.reader import Expense
+from ledger.tombstones import load_deleted
+
+HEADER = struct.Struct("=4q")
+OFFSET = struct.Struct("=q")
+TAIL_BYTES = 64
+HEAD_BYTES = 4096
+ROW_CACHE_SIZE = 100_000
+
+# path -> [CSV inode, bytes checked, CRC32 of their tail, category merges,
+#          CSV mtime, {row id: Expense}]
+_parsed = {}
+
+def offsets_path(path):
+    return path + ".offsets"
+
+def tail_crc(file, size):
+    start = max(size - TAIL_BYTES, 0)
+    file.seek(start)
+    return zlib.crc32(file.read(size - start))
+
+def head_crc(file, size):
+    """CRC32 of the first bytes (at most HEAD_BYTES) of the first size bytes."""
+    file.seek(0)
+    return zlib.crc32(file.read(min(size, HEAD_BYTES)))
+
+def _parsed_rows(path, file, merges):
+    """Returns {row id: Expense} of the rows already parsed from the open
+    CSV file, emptied first if the file was rewritten since.
+
+    A file modified without growing was edited in place, which empties
+    them too.
+    """
+    st = os.fstat(file.fileno())
+    cached = _parsed.get(path)
+    if (cached is None or cached[0] != st.st_ino or cached[1] > st.st_size
+            or (cached[1] == st.st_size and cached[4] != st.st_mtime_ns)
+            or cached[2] != tail_crc(file, cached[1]) or cached[3] != merges):
+        cached = _parsed[path] = [st.st_ino, 0, 0, merges, st.st_mtime_ns, {}]
+    if cached[1] != st.st_size:  # Appends keep the parsed rows valid
+        cached[1], cached[2] = st.st_size, tail_crc(file, st.st_size)
+    cached[4] = st.st_mtime_ns
+    rows = cached[5]
+    if len(rows) >= ROW_CACHE_SIZE:
+        for row_id in list(islice(rows, len(rows) // 2)):  # Oldest half
+            del rows[row_id]
+    return rows
+
+def _is_expense(record):
+    """Tells whether one raw CSV record has the three expense fields."""
+    if b'"' not in record:
+        return record.count(b",") >= 2
+    row = next(csv.reader(io.StringIO(record.decode(), newline="")), [])
+    return len(row) >= 3
+
+def _scan(file, start, skip_header):
+    """Returns the offsets of the expense rows from byte start on, and the end offset."""
+    offsets = array.array("q")
+    file.seek(start)
+    pos = record_start = start
+    record = b""
+    for line in file:
+        if not record:
+            record_start = pos
+        record += line
+        pos += len(line)
+        if record.count(b'"') % 2:  # Newline inside a quoted field
+            continue
+        if skip_header:
+            skip_header = False
+        elif _is_expense(record):
+            offsets.append(record_start)
+        record = b""
+    return offsets, pos
+
+class RowIndex:
+    """Seekable map from row id (see ledger.reader.iter_rows) to byte offset.
+
+    count is the number of indexed rows and size the number of indexed
+    bytes of the CSV file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = self.refresh()
+
+    def _header(self):
+        try:
+            with open(offsets_path(self.path), mode="rb") as file:
+                data = file.read(HEADER.size)
+        except FileNotFoundError:
+            return None
+        return HEADER.unpack(data) if len(data) == HEADER.size else None
+
+    def refresh(self):
+        """Brings the index up to date with the CSV file and returns the row count."""
+        with locked(self.path):
+            return self._refresh()
+
+    def _refresh(self):
+        with open(self.path, mode="rb") as csv_file:
+            st = os.fstat(csv_file.fileno())
+            header = self._header()
+            if (header is not None and header[0] == st.st_ino and header[1] <= st.st_size
+                    and header[2] == tail_crc(csv_file, header[1])):
+                _, indexed_size, _, count = header
+                if indexed_size == st.st_size:
+                    self.size = indexed_size
+                    return count
+                offsets, end = _scan(csv_file, indexed_size, skip_header=False)
+            else:
+                count = 0
+                offsets, end = _scan(csv_file, 0, skip_header=True)
+            crc = tail_crc(csv_file, end)
+
+        # The header goes last, so an interrupted update is never trusted
+        with open(offsets_path(self.path), mode="r+b" if count else "wb") as file:
+            file.seek(HEADER.size + count * OFFSET.size)
+            offsets.tofile(file)
+            file.truncate()
+            file.seek(0)
+            file.write(HEADER.pack(st.st_ino, end, crc, count + len(offsets)))
+        self.size = end
+        return count + len(offsets)
+
+    def offset(self, row_id):
+        """Returns the byte offset of row id in the CSV file."""
+        if not 1 <= row_id <= self.count:
+            raise IndexError(f"row {row_id} out of range")
+        with open(offsets_path(self.path), mode="rb") as file:
+            file.seek(HEADER.size + (row_id - 1) * OFFSET.size)
+            return OFFSET.unpack(file.read(OFFSET.size))[0]
+
+    def read_rows(self, row_ids):
+        """Yields (row id, Expense) for each row id, seeking to the rows not
+        parsed before."""
+        categories = load_categories(self.path)
+        with open(offsets_path(self.path), mode="rb") as offsets, open(self.path, mode="rb") as file:
+            parsed = _parsed_rows(self.path, file, categories.merges)
+            for row_id in row_ids:
+                if not 1 <= row_id <= self.count:
+                    raise IndexError(f"row {row_id} out of range")
+                expense = parsed.get(row_id)
+                if expense is not None:
+                    yield row_id, expense
+                    continue
+                offsets.seek(HEADER.size + (row_id - 1) * OFFSET.size)
+                file.seek(OFFSET.unpack(offsets.read(OFFSET.size))[0])
+                record = file.readline()
+                while record.count(b'"') % 2:  # Newline inside a quoted field
+                    line = file.readline()
+                    if not line:
+                        break
+                    record += line
+                row = next(csv.reader(io.StringIO(record.decode(), newline="")))
+                expense = parsed[row_id] = Expense(row[0], categories.canonical(row[1]), row[2])
+                yield row_id, expense
+
+def row_id_for_number(number, deleted):
+    """Maps a row number as shown by view_expenses to its row id.
+
+    deleted is the sorted list of deleted row ids.
+    """
+    row_id = number
+    for deleted_id in deleted:
+        if deleted_id > row_id:
+            break
+        row_id += 1
+    return row_id
+
+def iter_rows_from(path, number):
+    """Yields (row number, row id, Expense) for the live rows from number on.
+
+    Seeks straight to the first wanted row instead of reading the rows
+    before it.
+    """
+    if number < 1:
+        return
+    index = RowIndex(path)
+    deleted = load_deleted(path)
+    row_id = row_id_for_number(number, sorted(deleted))
+    if row_id > index.count:
+        return
+    canonical = load_categories(path).canonical
+    with open(path, mode="rb") as file:
+        file.seek(index.offset(row_id))
+        for row in csv.reader(io.TextIOWrapper(file, newline="")):
+            if len(row) < 3:  # Blank or truncated line
+                continue
+            if row_id not in deleted:
+                yield number, row_id, Expense(row[0], canonical(row[1]), row[2])
+                number += 1
+            row_id += 1
+
+def iter_numbered(path, start=1):
+    """Yields (row number, Expense) for the live rows from row number start on."""
+    for number, _, expense in iter_rows_from(path, start):
+        yield number, expense
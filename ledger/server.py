@@ -0,0 +1,100 @@
+"""JSON-lines server over a Unix socket for the functions of ledger/api.py.
+
+Each request is one line holding a JSON object: "op" names the operation
+("add", "list", "delete", "aggregate" or "top"), an optional "id" is echoed
+back, and the other keys are the function's arguments, e.g.
+
+    {"id": 7, "op": "add", "date": "2024-05-01", "category": "Food", "amount": "9.50"}
+
+Each reply is one line: {"id": 7, "ok": true, "result": ...}, or
+{"id": 7, "ok": false, "error": "..."}. A client may send several
+requests without waiting; replies come back in the same order.
+
+One event loop serves every client and runs the operations one at a
+time, so they never interleave, and the ledger's running totals and
+indexes stay in this process's memory between requests.
+"""
+
+import asyncio
+import json
+import os
+import signal
+
+from ledger import api
+
+OPERATIONS = {
+    "add": api.add_expense,
+    "list": api.list_expenses,
+    "delete": api.delete_expenses,
+    "aggregate": api.aggregate,
+    "top": api.top_expenses,
+}
+
+# Longest accepted request line, in bytes
+LINE_LIMIT = 1 << 20
+
+def handle(path, storage, request):
+    """Runs one decoded request; returns the reply object."""
+    if not isinstance(request, dict):
+        return {"ok": False, "error": "expected a JSON object"}
+    arguments = dict(request)
+    reply = {"id": arguments.pop("id")} if "id" in arguments else {}
+    op = arguments.pop("op", None)
+    operation = OPERATIONS.get(op) if isinstance(op, str) else None
+    if operation is None:
+        reply.update(ok=False, error=f"unknown op, expected one of {sorted(OPERATIONS)}")
+        return reply
+    try:
+        reply.update(ok=True, result=operation(path, storage=storage, **arguments))
+    except (TypeError, ValueError) as error:
+        reply.update(ok=False, error=str(error))
+    except Exception as error:  # Whatever went wrong, the client gets a reply
+        reply.update(ok=False, error=f"{type(error).__name__}: {error}")
+    return reply
+
+async def _serve_client(path, storage, reader, writer):
+    try:
+        while line := await reader.readline():
+            try:
+                request = json.loads(line)
+            except ValueError as error:  # Not JSON, or not even UTF-8
+                reply = {"ok": False, "error": f"invalid JSON: {error}"}
+            else:
+                reply = handle(path, storage, request)
+            writer.write(json.dumps(reply).encode() + b"\n")
+            await writer.drain()
+    except (ConnectionError, ValueError):  # Client went away, or sent too long a line
+        pass
+    except asyncio.CancelledError:
+        pass  # The server is stopping; end quietly rather than as a logged error
+    finally:
+        writer.close()
+
+async def serve(path, socket_path, storage="csv", ready=None):
+    """Serves the ledger at path on socket_path until cancelled.
+
+    ready, if given, is an asyncio.Event set once clients can connect.
+    """
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # Left behind by a server that was killed
+    server = await asyncio.start_unix_server(
+        lambda reader, writer: _serve_client(path, storage, reader, writer), socket_path, limit=LINE_LIMIT)
+    try:
+        async with server:
+            if ready is not None:
+                ready.set()
+            await server.serve_forever()
+    finally:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+async def serve_until_signalled(path, socket_path, storage="csv"):
+    """Runs serve() until SIGINT or SIGTERM, then closes it cleanly."""
+    task = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, task.cancel)
+    try:
+        await serve(path, socket_path, storage)
+    except asyncio.CancelledError:
+        pass
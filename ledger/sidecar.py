@@ -0,0 +1,77 @@
+import json
+import os
+
+from ledger.locking import atomic_write
+
+SIDECAR_VERSION = 10
+
+# The running totals, rewritten on every append, and the rollup: the same
+# totals plus the month cube and the ranked heaps, only written when a
+# query or a deletion needed them (see ledger/aggregate.py)
+SIDECARS = ("totals", "rollup")
+
+# sidecar file -> (its file stamp, "stamp" it holds), as last read or
+# written by this process
+_held = {}
+
+def sidecar_path(path, name="totals"):
+    """Returns the sidecar file kept next to the CSV file."""
+    return f"{path}.{name}.json"
+
+def _sidecar_stamp(sidecar):
+    st = os.stat(sidecar)
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+def load_sidecar(path, name="totals"):
+    """Returns the saved summary state, or None if missing or unreadable.
+
+    The state's "stamp" tells which version of the CSV file it describes.
+    """
+    sidecar = sidecar_path(path, name)
+    try:
+        file_stamp = _sidecar_stamp(sidecar)  # Before reading: a newer file must not look known
+        with open(sidecar, mode="r") as file:
+            state = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if state.get("version") != SIDECAR_VERSION:
+        return None
+    _held[sidecar] = (file_stamp, state["stamp"])
+    return state
+
+def held_stamp(path, name="totals"):
+    """Returns the "stamp" of the saved state, or None if there is none.
+
+    The file is only read if it changed since this process last read or
+    wrote it.
+    """
+    sidecar = sidecar_path(path, name)
+    try:
+        file_stamp = _sidecar_stamp(sidecar)
+    except OSError:
+        return None
+    held = _held.get(sidecar)
+    if held is not None and held[0] == file_stamp:
+        return held[1]
+    state = load_sidecar(path, name)
+    return None if state is None else state["stamp"]
+
+def save_sidecar(path, stamp, state, name="totals"):
+    """Atomically replaces the sidecar with state, tagged with stamp."""
+    sidecar = sidecar_path(path, name)
+    state = dict(state, version=SIDECAR_VERSION, stamp=list(stamp))
+    # Not fsynced: a sidecar lost in a crash is simply rebuilt. dumps()
+    # encodes in C, where dump() streams through the Python encoder.
+    with atomic_write(sidecar, durable=False) as file:
+        file.write(json.dumps(state))
+    _held[sidecar] = (_sidecar_stamp(sidecar), state["stamp"])
+
+def drop_sidecar(path):
+    """Removes the sidecars so the next query rebuilds them."""
+    for name in SIDECARS:
+        sidecar = sidecar_path(path, name)
+        _held.pop(sidecar, None)
+        try:
+            os.remove(sidecar)
+        except FileNotFoundError:
+            pass
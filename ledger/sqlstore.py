@@ -0,0 +1,265 @@
+"""SQLite storage for a ledger.
+
+The expenses live in one table of a SQLite database next to the CSV file
+(expenses.db for expenses.csv), opened in WAL mode so readers never wait
+for a writer:
+
+    expenses(id INTEGER PRIMARY KEY, date TEXT, category TEXT, amount INTEGER)
+
+Dates are stored as YYYY-MM-DD and amounts as integer cents. Indexes on
+date, on category (case-insensitive for ASCII letters) and on amount turn
+filtered deletes, min/max and top-k into indexed queries, and a covering
+index on (category, amount) lets per-category totals skip the table itself.
+
+Migrate an existing CSV ledger with:
+
+    python -m ledger to-sqlite expenses.csv
+    python -m ledger to-csv expenses.csv --storage sqlite
+"""
+
+import csv
+import os
+import sqlite3
+
+from ledger.aggregate import Summary
+from ledger.amounts import format_cents, parse_cents
+from ledger.dates import format_day, parse_day
+from ledger.locking import atomic_write, locked
+from ledger.reader import Expense, iter_expenses as iter_csv_expenses
+from ledger.table import ExpenseTable
+from ledger.validate import check_expense
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS expenses (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    category TEXT NOT NULL,
+    amount INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS expenses_date ON expenses (date);
+CREATE INDEX IF NOT EXISTS expenses_category ON expenses (category COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS expenses_totals ON expenses (category, amount);
+CREATE INDEX IF NOT EXISTS expenses_amount ON expenses (amount);
+"""
+
+def sqlite_path(csv_path):
+    """Returns the database file that stands in for csv_path."""
+    return os.path.splitext(csv_path)[0] + ".db"
+
+def _encode(row):
+    return format_day(parse_day(row[0])), row[1], parse_cents(row[2])
+
+def _expense(date, category, amount):
+    return Expense(date, category, format_cents(amount))
+
+class SqliteLedger:
+    """A ledger stored in a SQLite table, with the ColumnarLedger interface.
+
+    find() returns (row id, Expense) pairs, where the row id is the
+    table's primary key rather than a row number.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM expenses").fetchone()[0]
+
+    def append(self, rows):
+        """Appends expense rows given as (date, category, amount) sequences."""
+        with self.db:
+            self.db.executemany("INSERT INTO expenses (date, category, amount) VALUES (?, ?, ?)",
+                                map(_encode, rows))
+
+    def append_checked(self, rows):
+        """Validates every row, then appends them all; see writer.append_expenses."""
+        rows = [[str(value) for value in row] for row in rows]
+        for number, row in enumerate(rows, start=1):
+            problem = check_expense(row)
+            if problem is not None:
+                raise ValueError(f"Row {number}: {problem}")
+        self.append(rows)
+        return len(rows)
+
+    def iter_expenses(self):
+        """Yields the stored expenses as Expense rows, oldest first."""
+        for row in self.db.execute("SELECT date, category, amount FROM expenses ORDER BY id"):
+            yield _expense(*row)
+
+    def iter_numbered(self, start=1):
+        """Yields (row number, Expense) from row number start on."""
+        start = max(start, 1)
+        cursor = self.db.execute(
+            "SELECT date, category, amount FROM expenses ORDER BY id LIMIT -1 OFFSET ?", (start - 1,))
+        for number, row in enumerate(cursor, start=start):
+            yield number, _expense(*row)
+
+    def find(self, date=None, category=None):
+        """Returns the ExpenseTable of the rows with this date or category."""
+        if date is not None:
+            cursor = self.db.execute(
+                "SELECT id, date, category, amount FROM expenses WHERE date = ? ORDER BY id", (date,))
+        else:
+            cursor = self.db.execute(
+                "SELECT id, date, category, amount FROM expenses WHERE category = ? COLLATE NOCASE"
+                " ORDER BY id", (category.strip(),))
+        return ExpenseTable((row_id, _expense(*row)) for row_id, *row in cursor)
+
+    def find_between(self, start=None, end=None):
+        """Returns the ExpenseTable of the rows dated from start to end
+        (inclusive; None leaves that end open), in date order."""
+        bounds = []
+        params = []
+        if start:
+            bounds.append("date >= ?")
+            params.append(format_day(parse_day(start)))
+        if end:
+            bounds.append("date <= ?")
+            params.append(format_day(parse_day(end)))
+        where = f" WHERE {' AND '.join(bounds)}" if bounds else ""
+        cursor = self.db.execute(
+            f"SELECT id, date, category, amount FROM expenses{where} ORDER BY date, id", params)
+        return ExpenseTable((row_id, _expense(*row)) for row_id, *row in cursor)
+
+    def summarize(self):
+        """Computes the ledger Summary with grouped and indexed queries."""
+        summary = Summary()
+        for category, total, count in self.db.execute(
+                "SELECT category, SUM(amount), COUNT(*) FROM expenses GROUP BY category ORDER BY MIN(id)"):
+            summary.by_category[category] = total
+            summary.category_counts[category] = count
+            summary.total += total
+            summary.count += count
+        if not summary.count:
+            return summary
+
+        extreme = "SELECT date, category, amount FROM expenses ORDER BY amount {}, id LIMIT 1"
+        summary.maximum = _expense(*self.db.execute(extreme.format("DESC")).fetchone())
+        summary.minimum = _expense(*self.db.execute(extreme.format("ASC")).fetchone())
+        summary.max_amount = parse_cents(summary.maximum.amount)
+        summary.min_amount = parse_cents(summary.minimum.amount)
+
+        for year, month, category, total, count, highest in self.db.execute(
+                "SELECT CAST(substr(date, 1, 4) AS INTEGER), CAST(substr(date, 6, 2) AS INTEGER),"
+                " category, SUM(amount), COUNT(*), MAX(amount) FROM expenses GROUP BY 1, 2, 3"):
+            summary.months.setdefault((year, month), {})[category] = [total, count, highest]
+        return summary
+
+    def ranked(self, k, by=None, cheapest=False):
+        """Returns the k most expensive rows (with cheapest=True the k
+        cheapest) as (group, Expense) pairs, best first within each group.
+
+        by=None ranks the whole ledger, with None as group; "category" and
+        "month" rank each category or YYYY-MM month apart. Every group is
+        one query that walks an index in amount order and stops after k
+        rows.
+        """
+        order = f"ORDER BY amount {'ASC' if cheapest else 'DESC'}, date DESC, category DESC LIMIT ?"
+        if by is None:
+            groups = [(None, "", ())]
+        elif by == "category":
+            categories = self._skip_scan("SELECT MIN(category) FROM expenses WHERE category > ?",
+                                         lambda category: category)
+            groups = [(category, "WHERE category = ?", (category,)) for category in categories]
+        else:
+            months = self._skip_scan("SELECT substr(MIN(date), 1, 7) FROM expenses WHERE date > ?",
+                                     lambda month: month + "~")  # "~" sorts after every day
+            # +date keeps SQLite on the amount index rather than sorting the month
+            groups = [(month, "WHERE +date >= ? AND +date < ?", (month, month + "~")) for month in months]
+        found = []
+        for group, where, params in groups:
+            cursor = self.db.execute(f"SELECT date, category, amount FROM expenses {where} {order}", (*params, k))
+            found.extend((group, _expense(*row)) for row in cursor)
+        return found
+
+    def _skip_scan(self, query, past):
+        """Returns the distinct values of an indexed column, one index seek
+        each: query selects the smallest one above a bound, and past(value)
+        is a bound above every row holding value."""
+        values = []
+        value = self.db.execute(query, ("",)).fetchone()[0]
+        while value is not None:
+            values.append(value)
+            value = self.db.execute(query, (past(value),)).fetchone()[0]
+        return values
+
+    def delete(self, should_delete):
+        """Deletes the rows matching should_delete.
+
+        should_delete is called with the row number (starting at 1) and the
+        Expense. Returns the list of removed rows.
+        """
+        found = []
+        cursor = self.db.execute("SELECT id, date, category, amount FROM expenses ORDER BY id")
+        for number, (row_id, *row) in enumerate(cursor, start=1):
+            expense = _expense(*row)
+            if should_delete(number, expense):
+                found.append((row_id, expense))
+        self.delete_found(found)
+        return [expense for _, expense in found]
+
+    def delete_found(self, matches, respell=None):
+        """Deletes the (row id, Expense) pairs returned by find().
+
+        Row ids are primary keys and never point at another row, so
+        respell (see ColumnarLedger.delete_found) is not needed.
+        """
+        with self.db:
+            self.db.executemany("DELETE FROM expenses WHERE id = ?", ((row_id,) for row_id, _ in matches))
+
+    def delete_row(self, number):
+        """Deletes the row with this number; returns it, or None if out of range."""
+        if number < 1:
+            return None
+        row = self.db.execute("SELECT id, date, category, amount FROM expenses ORDER BY id"
+                              " LIMIT 1 OFFSET ?", (number - 1,)).fetchone()
+        if row is None:
+            return None
+        self.delete_found([(row[0], None)])
+        return _expense(*row[1:])
+
+# path -> SqliteLedger: one connection per database for the whole process
+_ledgers = {}
+
+def open_sqlite(path):
+    """Returns this process's SqliteLedger for the database at path, so the
+    connection, its pragmas and the schema check are paid for once."""
+    store = _ledgers.get(path)
+    if store is None:
+        store = _ledgers[path] = SqliteLedger(path)
+    return store
+
+def import_csv(csv_path, db_path=None, batch_size=65536):
+    """Replaces the SQLite ledger with the rows of a Date,Category,Amount CSV."""
+    store = SqliteLedger(db_path or sqlite_path(csv_path))
+    with store.db:
+        # Building the indexes once at the end beats updating them per row
+        for (name,) in store.db.execute("SELECT name FROM sqlite_master WHERE type = 'index'"
+                                        " AND tbl_name = 'expenses'").fetchall():
+            store.db.execute(f"DROP INDEX {name}")
+        store.db.execute("DELETE FROM expenses")
+        batch = []
+        for expense in iter_csv_expenses(csv_path):
+            batch.append(_encode(expense))
+            if len(batch) >= batch_size:
+                store.db.executemany("INSERT INTO expenses (date, category, amount) VALUES (?, ?, ?)", batch)
+                batch = []
+        store.db.executemany("INSERT INTO expenses (date, category, amount) VALUES (?, ?, ?)", batch)
+    store.db.executescript(SCHEMA)
+    return store
+
+def export_csv(csv_path, db_path=None):
+    """Writes the SQLite ledger back out as a Date,Category,Amount CSV."""
+    store = SqliteLedger(db_path or sqlite_path(csv_path))
+    with locked(csv_path), atomic_write(csv_path, newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Date", "Category", "Amount"])
+        writer.writerows(store.iter_expenses())
+    return store
@@ -0,0 +1,175 @@
+"""Entry points the trackers call, dispatched on their STORAGE setting.
+
+"csv" keeps expenses in the CSV file itself; "columnar" keeps them in the
+typed arrays of ledger/columnar.py, in a directory next to the CSV file;
+"sqlite" keeps them in the indexed table of ledger/sqlstore.py, in a
+database file next to it.
+
+CSV ledgers may have rows waiting in a write-ahead log (ledger/wal.py):
+reads include them, and anything that works with row ids checkpoints the
+log first.
+
+Every storage shares the ledger's category dictionary (ledger/categories.py):
+rows are written and read back with canonical category names.
+"""
+
+from itertools import chain
+
+from ledger import aggregate, dateindex, keyindex, reader, rowindex, wal, writer
+from ledger.categories import load_categories
+from ledger.columnar import ColumnarLedger, columnar_path
+from ledger.sqlstore import open_sqlite, sqlite_path
+from ledger.table import ExpenseTable
+
+STORAGES = ("csv", "columnar", "sqlite")
+
+def _store(path, storage):
+    """Returns the ColumnarLedger or SqliteLedger for path, or None for the
+    CSV storage."""
+    if storage == "csv":
+        return None
+    if storage == "columnar":
+        return ColumnarLedger(columnar_path(path))
+    if storage == "sqlite":
+        return open_sqlite(sqlite_path(path))
+    raise ValueError(f"Unknown storage {storage!r}, expected one of {STORAGES}")
+
+def _canonical(path, expense):
+    return expense._replace(category=load_categories(path).canonical(expense.category))
+
+def _canonical_expenses(path, expenses):
+    canonical = load_categories(path).canonical
+    for expense in expenses:
+        yield expense._replace(category=canonical(expense.category))
+
+def _canonical_pairs(path, pairs):
+    """Respells the categories of (row id, Expense) pairs canonically."""
+    canonical = load_categories(path).canonical
+    for row_id, expense in pairs:
+        yield row_id, expense._replace(category=canonical(expense.category))
+
+def _canonical_rows(path, rows):
+    """Respells the categories of rows about to be stored, adding new ones
+    to the category dictionary."""
+    register = load_categories(path).register
+    return [[row[0], register(str(row[1])), *row[2:]] if len(row) == 3 else row for row in rows]
+
+def iter_expenses(path, storage="csv"):
+    """Yields the expenses one row at a time."""
+    store = _store(path, storage)
+    if store is not None:
+        return _canonical_expenses(path, store.iter_expenses())
+    return chain(reader.iter_expenses(path), _pending(path))
+
+def _pending(path):
+    yield from wal.pending_expenses(path)
+
+def iter_numbered(path, start=1, storage="csv"):
+    """Yields (row number, Expense) from row number start on, without
+    reading the rows before it."""
+    store = _store(path, storage)
+    if store is not None:
+        return _canonical_pairs(path, store.iter_numbered(start))
+    return chain(rowindex.iter_numbered(path, start), _pending_numbered(path, start))
+
+def _pending_numbered(path, start):
+    pending = wal.pending_expenses(path)
+    if pending:
+        first = aggregate.summarize(path).row_count + 1
+        for number, expense in enumerate(pending, start=first):
+            if number >= start:
+                yield number, expense
+
+def summarize(path, storage="csv", rollup=False):
+    """Returns the Summary of the ledger; with rollup, one that keeps the
+    month cube and the ranked heaps, which only CSV ledgers may leave out."""
+    store = _store(path, storage)
+    if store is not None:
+        return store.summarize().merge_categories(load_categories(path).canonical)
+    summary = aggregate.summarize(path, rollup)
+    pending = wal.pending_expenses(path)
+    if pending:
+        summary = summary.copy()
+        for expense in pending:
+            summary.add(expense)
+    return summary
+
+def append_expense(path, row, storage="csv"):
+    """Appends one (date, category, amount) row."""
+    store = _store(path, storage)
+    if store is not None:
+        expense = writer._to_expense(path, row)
+        store.append([expense])
+        return expense
+    wal.checkpoint(path)  # Keep rows in the order they were added
+    return writer.append_expense(path, row)
+
+def append_expenses(path, rows, flush_size=writer.FLUSH_SIZE, storage="csv"):
+    """Validates and appends many rows at once; returns how many."""
+    store = _store(path, storage)
+    if store is not None:
+        return store.append_checked(_canonical_rows(path, rows))
+    wal.checkpoint(path)
+    return writer.append_expenses(path, rows, flush_size)
+
+def delete_expenses(path, should_delete, storage="csv"):
+    """Removes the rows matching should_delete(row_number, expense)."""
+    store = _store(path, storage)
+    if store is not None:
+        removed = store.delete(lambda number, expense: should_delete(number, _canonical(path, expense)))
+        return [_canonical(path, expense) for expense in removed]
+    wal.checkpoint(path)
+    return writer.delete_expenses(path, should_delete)
+
+def find_expenses(path, date=None, category=None, storage="csv"):
+    """Returns the ExpenseTable (row id, Expense) of the rows with this date
+    or category (case-insensitive, or any of its aliases), for passing to
+    delete_found()."""
+    store = _store(path, storage)
+    if store is not None:
+        if date is not None:
+            return ExpenseTable(_canonical_pairs(path, store.find(date)))
+        categories = load_categories(path)
+        category_id = categories.lookup(category)
+        keys = [category] if category_id is None else categories.keys_of(category_id)
+        found = sorted(pair for key in keys for pair in store.find(category=key))
+        return ExpenseTable(_canonical_pairs(path, found))
+    wal.checkpoint(path)
+    return keyindex.find_expenses(path, date, category)
+
+def find_between(path, start=None, end=None, storage="csv"):
+    """Returns the ExpenseTable of the rows dated from start to end
+    (YYYY-MM-DD, inclusive; None leaves that end open), in date order.
+    The row ids can be passed to delete_found()."""
+    store = _store(path, storage)
+    if store is not None:
+        return ExpenseTable(_canonical_pairs(path, store.find_between(start, end)))
+    wal.checkpoint(path)
+    return dateindex.expenses_between(path, start, end)
+
+def summarize_between(path, start=None, end=None, storage="csv"):
+    """Returns the Summary of the rows dated from start to end; with no
+    bounds, the Summary of the whole ledger."""
+    if not start and not end:
+        return summarize(path, storage)
+    summary = aggregate.Summary()
+    for expense in find_between(path, start, end, storage).expenses():
+        summary.add(expense)
+    return summary
+
+def delete_found(path, matches, storage="csv"):
+    """Removes the rows returned by find_expenses()."""
+    store = _store(path, storage)
+    if store is not None:
+        store.delete_found(matches, lambda expense: _canonical(path, expense))
+    else:
+        writer.delete_found(path, matches)
+
+def delete_row(path, number, storage="csv"):
+    """Removes the row with this number; returns it, or None if out of range."""
+    store = _store(path, storage)
+    if store is not None:
+        expense = store.delete_row(number)
+        return None if expense is None else _canonical(path, expense)
+    wal.checkpoint(path)
+    return writer.delete_row(path, number)
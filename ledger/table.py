@@ -0,0 +1,108 @@
+"""Compact in-memory table of expense rows.
+
+An ExpenseTable holds the (row id, Expense) pairs of a query result as
+four typed columns: row ids and amounts in integer cents as int64, day
+numbers and category ids as int32. Each category name is stored once and
+shared by its rows. That is 24 bytes a row, against some 250 for a list
+of (row id, Expense) tuples of str.
+
+Expenses are rebuilt on access and read back exactly as they were
+stored: the few rows whose date or amount text is not in canonical form
+("3.5", "2024-4-12", or not a date at all in an old file), or whose
+amount does not fit in int64 cents, are kept as they are, on the side.
+
+A table stands in for a list of (row id, Expense) pairs: it supports
+len(), iteration, indexing and slicing.
+"""
+
+import array
+
+from ledger.amounts import MAX_CENTS, format_cents, parse_cents
+from ledger.dates import format_day, parse_day
+from ledger.reader import Expense
+
+class ExpenseTable:
+    """(row id, Expense) pairs stored column by column."""
+
+    def __init__(self, pairs=()):
+        self.row_ids = array.array("q")
+        self.days = array.array("i")
+        self.amounts = array.array("q")
+        self.category_ids = array.array("i")
+        self.categories = []
+        self._category_ids = {}
+        self._verbatim = {}  # index -> Expense not in canonical form
+        self.extend(pairs)
+
+    def category_id(self, name):
+        """Returns the id of a category name, adding it if new."""
+        category_id = self._category_ids.get(name)
+        if category_id is None:
+            category_id = self._category_ids[name] = len(self.categories)
+            self.categories.append(name)
+        return category_id
+
+    def append(self, row_id, expense):
+        self.extend([(row_id, expense)])
+
+    def extend(self, pairs):
+        row_ids, days, amounts, category_ids = self.row_ids, self.days, self.amounts, self.category_ids
+        known, verbatim = self._category_ids, self._verbatim
+        index = len(row_ids)
+        for row_id, expense in pairs:
+            date, category, amount = expense
+            whole, fraction = amount[:-3], amount[-2:]
+            try:
+                day = parse_day(date)
+                # Canonical: zero-padded date, digits with no leading zero, a dot and two digits
+                if (len(date) == 10 and amount[-3:-2] == "." and whole.isdigit() and fraction.isdigit()
+                        and amount.isascii() and (whole[0] != "0" or len(whole) == 1)):
+                    cents = int(whole) * 100 + int(fraction)
+                else:
+                    cents = parse_cents(amount)
+                    verbatim[index] = expense
+                if not -MAX_CENTS <= cents <= MAX_CENTS:
+                    raise ValueError(f"amount {amount!r} out of range")
+            except ValueError:
+                day = cents = 0
+                verbatim[index] = expense
+            category_id = known.get(category)
+            if category_id is None:
+                category_id = self.category_id(category)
+            row_ids.append(row_id)
+            days.append(day)
+            amounts.append(cents)
+            category_ids.append(category_id)
+            index += 1
+
+    def __len__(self):
+        return len(self.row_ids)
+
+    def expense(self, index):
+        """Returns the Expense at index."""
+        verbatim = self._verbatim.get(index)
+        if verbatim is not None:
+            return verbatim
+        return Expense(format_day(self.days[index]), self.categories[self.category_ids[index]],
+                       format_cents(self.amounts[index]))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ExpenseTable(self[i] for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("table index out of range")
+        return self.row_ids[index], self.expense(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.row_ids[index], self.expense(index)
+
+    def expenses(self):
+        """Yields the Expenses without their row ids."""
+        for index in range(len(self)):
+            yield self.expense(index)
+
+    def __repr__(self):
+        return f"ExpenseTable({list(self)!r})"
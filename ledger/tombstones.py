@@ -0,0 +1,93 @@
+"""Deletion log for CSV ledgers.
+
+Deleting a row appends its row id (its position among the expense rows
+of expenses.csv, starting at 1) to expenses.csv.deleted instead of
+rewriting the CSV file. Readers skip the logged rows, and compaction
+rewrites the file once enough of it is dead.
+
+The log starts with the inode of the CSV file it belongs to, so a log
+left over from before a rewrite is ignored. The set of deleted ids is
+kept in memory until the log changes on disk, and deletions made by this
+process update it in place.
+"""
+
+import array
+import os
+
+# path -> (log stamp, frozenset of deleted row ids) of the last read
+_deleted = {}
+
+def deleted_path(path):
+    return path + ".deleted"
+
+def _log_stamp(path):
+    """Returns (CSV inode, log inode, log size, log mtime), or None without a log."""
+    try:
+        st = os.stat(deleted_path(path))
+    except FileNotFoundError:
+        return None
+    return (os.stat(path).st_ino, st.st_ino, st.st_size, st.st_mtime_ns)
+
+def load_deleted(path):
+    """Returns the frozenset of deleted row ids of the CSV file at path."""
+    stamp = _log_stamp(path)
+    if stamp is None:
+        _deleted.pop(path, None)
+        return frozenset()
+    cached = _deleted.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    ids = array.array("q")
+    try:
+        with open(deleted_path(path), mode="rb") as file:
+            ids.frombytes(file.read())
+    except FileNotFoundError:
+        return frozenset()
+    deleted = frozenset(ids[1:]) if ids and ids[0] == stamp[0] else frozenset()
+    _deleted[path] = (stamp, deleted)
+    return deleted
+
+def mark_deleted(path, row_ids):
+    """Appends row ids to the deletion log and flushes it to disk; ids
+    that are logged already are not logged again."""
+    logged = load_deleted(path)
+    row_ids = [row_id for row_id in dict.fromkeys(row_ids) if row_id not in logged]
+    if not row_ids:
+        return
+    ids = array.array("q", row_ids)
+    inode = os.stat(path).st_ino
+    before = _log_stamp(path)
+    try:
+        with open(deleted_path(path), mode="rb") as file:
+            current = array.array("q", file.read(ids.itemsize))
+    except FileNotFoundError:
+        current = None
+    if current and current[0] == inode:
+        mode = "ab"
+    else:
+        mode = "wb"
+        ids.insert(0, inode)
+    with open(deleted_path(path), mode=mode) as file:
+        ids.tofile(file)
+        file.flush()
+        os.fsync(file.fileno())
+    cached = _deleted.get(path)
+    if mode == "wb":
+        _deleted[path] = (_log_stamp(path), frozenset(row_ids))
+    elif cached is not None and cached[0] == before:
+        _deleted[path] = (_log_stamp(path), cached[1].union(row_ids))
+
+def deleted_count(path):
+    """Returns the number of rows in the deletion log, without reading it."""
+    try:
+        size = os.stat(deleted_path(path)).st_size
+    except FileNotFoundError:
+        return 0
+    return max(size // array.array("q").itemsize - 1, 0)
+
+def clear_deleted(path):
+    _deleted.pop(path, None)
+    try:
+        os.remove(deleted_path(path))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,21 @@
+from ledger.amounts import MAX_CENTS, format_cents, parse_cents
+from ledger.dates import is_valid_date
+
+def validate_date(date_str):
+    return is_valid_date(date_str)
+
+def validate_amount(amount_str):
+    try:
+        return 0 < parse_cents(amount_str) <= MAX_CENTS
+    except ValueError:
+        return False
+
+def check_expense(row):
+    """Returns what is wrong with a (date, category, amount) row, or None."""
+    if len(row) != 3:
+        return "expected Date,Category,Amount"
+    if not validate_date(row[0]):
+        return f"invalid date {row[0]!r}, expected YYYY-MM-DD"
+    if not validate_amount(row[2]):
+        return f"invalid amount {row[2]!r}, expected a positive number of at most {format_cents(MAX_CENTS)}"
+    return None
@@ -0,0 +1,263 @@
+"""Write-ahead log with group commit for high-rate ingestion.
+
+Scripted ingestion appends through a WriteAheadLog instead of opening the
+CSV file once per row. Rows from any number of threads are gathered for
+COMMIT_INTERVAL seconds, written to expenses.csv.wal as one frame and made
+durable with a single fsync; append() returns once its frame is on disk.
+A background checkpointer folds the log into the CSV file once it holds
+CHECKPOINT_SIZE bytes or every CHECKPOINT_INTERVAL seconds.
+
+Rows still in the log are visible right away: the storage entry points
+read them after the CSV rows, and checkpoint the log before anything that
+works with row ids (find, delete, compact).
+
+Layout: a header of two int64 values, the inode of the CSV file and the
+CSV size at which a checkpoint started copying the log (-1 when none is
+in progress), then frames of (payload length, CRC32 of the payload, row
+count) as uint32 followed by the rows as CSV text. A frame cut short by a
+crash fails its CRC and is dropped along with everything after it.
+Because the header records where copying started, a checkpoint cut short
+by a crash is finished, without duplicating rows, by the next one.
+"""
+
+import csv
+import io
+import os
+import struct
+import threading
+import time
+import zlib
+
+from ledger.categories import load_categories
+from ledger.locking import locked
+from ledger.reader import Expense
+from ledger.validate import check_expense
+from ledger.writer import _appended, _to_expense
+
+HEADER = struct.Struct("=2q")
+FRAME = struct.Struct("=3I")
+
+# Seconds rows wait for others to share their fsync
+COMMIT_INTERVAL = 0.01
+
+# Log size in bytes, and age in seconds, that trigger a checkpoint
+CHECKPOINT_SIZE = 1 << 20
+CHECKPOINT_INTERVAL = 1.0
+
+def wal_path(path):
+    return path + ".wal"
+
+def _read_log(path):
+    """Returns (header, payload of the intact frames, rows, end of the last
+    intact frame), or None if there is no log."""
+    try:
+        with open(wal_path(path), mode="rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        return None
+    if len(data) < HEADER.size:
+        return None
+    header = HEADER.unpack_from(data)
+    payloads = []
+    rows = 0
+    end = HEADER.size
+    while end + FRAME.size <= len(data):
+        length, crc, count = FRAME.unpack_from(data, end)
+        payload = data[end + FRAME.size:end + FRAME.size + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            break  # Torn by a crash
+        payloads.append(payload)
+        rows += count
+        end += FRAME.size + length
+    return header, b"".join(payloads), rows, end
+
+def _copied(path, header, payload):
+    """Returns how many bytes of payload an interrupted checkpoint already
+    copied to the end of the CSV file."""
+    inode, start = header
+    if start < 0:
+        return 0
+    with open(path, mode="rb") as file:
+        if os.fstat(file.fileno()).st_ino != inode:
+            return 0
+        file.seek(start)
+        copied = file.read(len(payload))
+    return len(copied) if payload.startswith(copied) else 0
+
+def pending_expenses(path):
+    """Returns the Expense rows in the log that are not in the CSV file yet."""
+    try:
+        if os.stat(wal_path(path)).st_size <= HEADER.size:
+            return []
+    except FileNotFoundError:
+        return []
+    log = _read_log(path)
+    if log is None:
+        return []
+    header, payload, _, _ = log
+    payload = payload[_copied(path, header, payload):]
+    canonical = load_categories(path).canonical
+    return [Expense(row[0], canonical(row[1]), row[2])
+            for row in csv.reader(io.StringIO(payload.decode(), newline="")) if len(row) >= 3]
+
+def checkpoint(path):
+    """Copies the rows of the log into the CSV file and empties the log.
+
+    Also finishes a checkpoint interrupted by a crash, and drops frames
+    torn by one. Returns the number of rows copied.
+    """
+    if not os.path.exists(wal_path(path)):
+        return 0
+    with locked(path):
+        log = _read_log(path)
+        if log is None:
+            return 0
+        header, payload, rows, _ = log
+        if payload:
+            if header[1] < 0:
+                # Record where copying starts before touching the CSV file
+                header = (os.stat(path).st_ino, os.stat(path).st_size)
+                with open(wal_path(path), mode="r+b") as file:
+                    file.write(HEADER.pack(*header))
+                    file.flush()
+                    os.fsync(file.fileno())
+            done = _copied(path, header, payload)
+            with open(path, mode="ab") as file:
+                file.write(payload[done:])
+                file.flush()
+                os.fsync(file.fileno())
+            _appended(path)
+        with open(wal_path(path), mode="r+b") as file:
+            file.truncate(0)
+            os.fsync(file.fileno())
+    return rows
+
+class WriteAheadLog:
+    """Group-committing appender for the CSV ledger at path.
+
+    Thread-safe; use it as a context manager, or call close(), which
+    checkpoints whatever is left in the log.
+    """
+
+    def __init__(self, path, commit_interval=COMMIT_INTERVAL,
+                 checkpoint_size=CHECKPOINT_SIZE, checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.commit_interval = commit_interval
+        self.checkpoint_size = checkpoint_size
+        self.checkpoint_interval = checkpoint_interval
+        checkpoint(path)  # Recover from an earlier crash
+        self._changed = threading.Condition()
+        self._rows = []
+        self._group = 1  # Group the next rows join
+        self._committed = 0  # Last group on disk
+        self._error = None
+        self._closing = False
+        self._size = None  # Log size after our last write
+        self._thread = threading.Thread(target=self._run, name="ledger-wal", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, rows, wait=True):
+        """Logs (date, category, amount) rows and returns how many.
+
+        Every row is validated first; if one is invalid nothing is logged
+        and ValueError says which. If wait, returns once the rows are on
+        disk; otherwise they are committed with the next group.
+        """
+        rows = [[str(value) for value in row] for row in rows]
+        for number, row in enumerate(rows, start=1):
+            problem = check_expense(row)
+            if problem is not None:
+                raise ValueError(f"Row {number}: {problem}")
+        with self._changed:
+            if self._closing:
+                raise ValueError("The write-ahead log is closed")
+            self._rows.extend(_to_expense(self.path, row) for row in rows)
+            group = self._group
+            self._changed.notify_all()
+            while wait and self._committed < group and self._error is None:
+                self._changed.wait()
+            if self._error is not None:
+                raise self._error
+        return len(rows)
+
+    def flush(self):
+        """Waits until every row appended so far is on disk."""
+        with self._changed:
+            # Rows already taken by the committer belong to the group before
+            group = self._group if self._rows else self._group - 1
+            while self._committed < group and self._error is None:
+                self._changed.wait()
+            if self._error is not None:
+                raise self._error
+
+    def close(self):
+        with self._changed:
+            if self._closing:
+                return
+            self._closing = True
+            self._changed.notify_all()
+        self._thread.join()
+        checkpoint(self.path)
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        last_checkpoint = time.monotonic()
+        while True:
+            with self._changed:
+                while not self._rows and not self._closing:
+                    if not self._changed.wait(self.checkpoint_interval):
+                        break  # Idle: a good time to checkpoint
+                # Let the group fill up
+                deadline = time.monotonic() + self.commit_interval
+                while self._rows and not self._closing and time.monotonic() < deadline:
+                    self._changed.wait(deadline - time.monotonic())
+                rows, self._rows = self._rows, []
+                group = self._group
+                self._group += 1
+                closing = self._closing
+            try:
+                if rows:
+                    self._commit(rows)
+                with self._changed:
+                    self._committed = group
+                    self._changed.notify_all()
+                if closing:
+                    return
+                if (time.monotonic() - last_checkpoint >= self.checkpoint_interval
+                        or (self._size or 0) >= self.checkpoint_size):
+                    checkpoint(self.path)
+                    self._size = None
+                    last_checkpoint = time.monotonic()
+            except Exception as error:
+                with self._changed:
+                    self._error = error
+                    self._changed.notify_all()
+                return
+
+    def _commit(self, rows):
+        """Writes rows to the log as one frame and fsyncs it."""
+        text = io.StringIO(newline="")
+        csv.writer(text).writerows(rows)
+        payload = text.getvalue().encode()
+        with locked(self.path), open(wal_path(self.path), mode="ab") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size != self._size:
+                # Someone else wrote or checkpointed the log: cut off a torn
+                # frame, so ours is not hidden behind it
+                log = _read_log(self.path)
+                size = log[3] if log is not None else 0
+                file.truncate(size)
+            if not size:
+                file.write(HEADER.pack(os.stat(self.path).st_ino, -1))
+            file.write(FRAME.pack(len(payload), zlib.crc32(payload), len(rows)))
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+            self._size = file.tell()
@@ -0,0 +1,240 @@
+import csv
+import os
+
+from ledger.aggregate import catch_up, known_summary, resume, saved_categories, store_summary, summarize
+from ledger.amounts import canonical_amount
+from ledger.categories import category_key, load_categories
+from ledger.locking import atomic_write, locked
+from ledger.reader import Expense, iter_rows, ledger_stamp
+from ledger.rowindex import RowIndex, iter_rows_from, offsets_path
+from ledger.tombstones import clear_deleted, deleted_count, load_deleted, mark_deleted
+from ledger.validate import check_expense
+
+# Dead-row share of the file above which compact() rewrites it
+COMPACT_THRESHOLD = 0.25
+
+# Rows handed to the OS per write by append_expenses()
+FLUSH_SIZE = 1000
+
+def append_expense(path, row):
+    """Appends one expense row and folds it into the running totals."""
+    expense = _to_expense(path, row)
+    with locked(path):
+        with open(path, mode="a", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(expense)
+        _appended(path)
+    return expense
+
+def _register(path, category):
+    """Returns the canonical name to store a category under, adding it to
+    the category dictionary if it is new.
+
+    Rows of a new category may be in the file already, from before the
+    dictionary knew it; then it keeps the name the saved totals have them
+    under, so the totals do not split.
+    """
+    categories = load_categories(path)
+    if categories.lookup(category) is None:
+        key = category_key(category)
+        for name in saved_categories(path):
+            if category_key(name) == key:
+                category = name
+                break
+    return categories.register(category)
+
+def _to_expense(path, row):
+    """Builds the Expense to store for a row, with its category and amount
+    in canonical form."""
+    date, category, amount = (str(value) for value in row)
+    return Expense(date, _register(path, category), canonical_amount(amount))
+
+def append_expenses(path, rows, flush_size=FLUSH_SIZE):
+    """Appends many expense rows with one open and one fsync.
+
+    Every row is validated first; if one is invalid nothing is written and
+    ValueError says which. Rows are written flush_size at a time. Returns
+    the number of rows written.
+    """
+    rows = [[str(value) for value in row] for row in rows]
+    for number, row in enumerate(rows, start=1):
+        problem = check_expense(row)
+        if problem is not None:
+            raise ValueError(f"Row {number}: {problem}")
+    expenses = [_to_expense(path, row) for row in rows]
+    if not expenses:
+        return 0
+
+    with Appender(path) as appender:
+        for start in range(0, len(expenses), flush_size):
+            appender.write(expenses[start:start + flush_size])
+    return len(expenses)
+
+class Appender:
+    """Appends batches of Expense rows through one open file.
+
+    Each write() hands its batch to the OS under the ledger's write lock,
+    so batches from concurrent writers never interleave; close() fsyncs
+    once and brings the running totals and indexes up to date. Rows are
+    not validated, but their categories are stored in canonical form.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.file = open(path, mode="a", newline="")
+        self.writer = csv.writer(self.file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, expenses):
+        names = {category: _register(self.path, category) for _, category, _ in expenses}
+        expenses = [Expense(date, names[category], amount) for date, category, amount in expenses]
+        with locked(self.path):
+            self.writer.writerows(expenses)
+            self.file.flush()
+        self.count += len(expenses)
+
+    def close(self):
+        if self.file.closed:
+            return
+        with locked(self.path):
+            os.fsync(self.file.fileno())
+            self.file.close()
+            _appended(self.path)
+
+def _appended(path):
+    """Folds freshly appended rows into the totals and the indexes.
+
+    Rows appended by other programs since the last update are folded in
+    too, as they come before ours in the file.
+    """
+    catch_up(path)
+    _refresh_indexes(path)
+
+def _refresh_indexes(path):
+    """Indexes new rows while they are still in the page cache. The key
+    index (ledger/keyindex.py) catches up when it is next queried."""
+    if os.path.exists(offsets_path(path)):
+        RowIndex(path)
+
+def _forget(path, before, row_ids, removed):
+    """Logs row_ids as deleted and takes their rows out of the running totals.
+
+    The caller holds the write lock. Row ids are only meaningful for the
+    file they were read from, so if it has been rewritten since before was
+    taken, nothing is deleted and ValueError is raised.
+    """
+    if ledger_stamp(path)[0] != before[0]:
+        raise ValueError("The ledger was rewritten since these rows were read; look them up again")
+    # The rollup too if it can be had without a scan, so that a
+    # deletion does not cost the next report one
+    summary = resume(path, before, rollup=True) or known_summary(path, before)
+    mark_deleted(path, row_ids)
+    if summary is not None:
+        exact = [summary.remove(expense) for expense in removed]
+        if all(exact):
+            store_summary(path, summary, rollup=True)
+
+def delete_expenses(path, should_delete):
+    """Marks the rows matching should_delete as deleted.
+
+    should_delete is called with the row number (starting at 1, as shown by
+    view_expenses) and the Expense. Matching rows go to the deletion log;
+    the CSV file itself is not rewritten. Returns the list of removed rows.
+    """
+    with locked(path):
+        before = ledger_stamp(path)
+        removed_ids = []
+        removed = []
+        for number, (row_id, expense) in enumerate(iter_rows(path), start=1):
+            if should_delete(number, expense):
+                removed_ids.append(row_id)
+                removed.append(expense)
+        if removed:
+            _forget(path, before, removed_ids, removed)
+    return removed
+
+def delete_found(path, matches):
+    """Marks the (row id, Expense) pairs from find_expenses() deleted.
+
+    If another session has compacted the file since the lookup, the row
+    ids point at other rows now, and if it has deleted any of these rows
+    they are gone already; then nothing is deleted and ValueError is
+    raised.
+    """
+    if matches:
+        with locked(path):
+            row_ids = [row_id for row_id, _ in matches]
+            removed = [expense for _, expense in matches]
+            if len(set(row_ids)) != len(row_ids) or not load_deleted(path).isdisjoint(row_ids):
+                raise ValueError("Some of these rows were deleted since they were read; look them up again")
+            try:
+                current = [expense for _, expense in RowIndex(path).read_rows(row_ids)]
+            except IndexError:
+                current = None
+            if current != removed:
+                raise ValueError("The ledger was rewritten since these rows were read; look them up again")
+            _forget(path, ledger_stamp(path), row_ids, removed)
+
+def delete_row(path, number):
+    """Marks the row with this number (as shown by view_expenses) deleted.
+
+    The row is found through the offset index, so only that row is read.
+    Returns the removed Expense, or None if there is no such row.
+    """
+    with locked(path):
+        before = ledger_stamp(path)
+        for _, row_id, expense in iter_rows_from(path, number):
+            _forget(path, before, [row_id], [expense])
+            return expense
+    return None
+
+def dead_ratio(path):
+    """Returns the share of expense rows in the file that are deleted."""
+    dead = deleted_count(path)
+    if not dead:
+        return 0.0
+    return dead / (dead + summarize(path).row_count)
+
+def compact(path, threshold=COMPACT_THRESHOLD):
+    """Rewrites the CSV file without its deleted rows, with every category
+    in its canonical spelling.
+
+    Nothing is done unless the dead-row ratio is at least threshold. The
+    new file is fsynced before it replaces the old one, so a crash leaves
+    one or the other. Returns the number of rows dropped.
+    """
+    with locked(path):
+        if not deleted_count(path) or dead_ratio(path) < threshold:
+            return 0
+
+        deleted = load_deleted(path)
+        names = {}
+        with open(path, mode="r", newline="") as src, atomic_write(path, newline="") as dst:
+            reader = csv.reader(src)
+            writer = csv.writer(dst)
+            header = next(reader, None)
+            if header is not None:
+                writer.writerow(header)
+            row_id = 0
+            for row in reader:
+                if len(row) < 3:  # Not an expense, keep it as it is
+                    if row:
+                        writer.writerow(row)
+                    continue
+                row_id += 1
+                if row_id not in deleted:
+                    name = names.get(row[1])
+                    if name is None:
+                        name = names[row[1]] = _register(path, row[1])
+                    row[1] = name
+                    writer.writerow(row)
+
+        clear_deleted(path)
+        summarize(path)  # The file changed identity, so this rebuilds the totals
+    return len(deleted)
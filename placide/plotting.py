@@ -0,0 +1,21 @@
+"""Charts for proj.py.
+
+Loaded only when the user asks for a chart, so starting the tracker does
+not pay for importing matplotlib and initializing its backend.
+"""
+
+import matplotlib.pyplot as plt
+
+def plot_category_totals(by_category):
+    """Shows a bar chart of {category: total in cents}."""
+    categories = list(by_category.keys())
+    amounts = [total / 100 for total in by_category.values()]
+
+    plt.figure(figsize=(10, 6))
+    plt.bar(categories, amounts)
+    plt.title('Expenses by Category')
+    plt.xlabel('Categories')
+    plt.ylabel('Amount ($)')
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.show()
@@ -1,35 +1,26 @@
 
 import csv
 import os
-from datetime import datetime
-import matplotlib.pyplot as plt
-from collections import defaultdict
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import ledger
 
 CSV_FILE = "expenses.csv"
+STORAGE = "csv"  # "csv", "columnar" or "sqlite", see ledger/storage.py
+BATCH_FLUSH_SIZE = 1000  # Rows per write when saving a batch entry
+VIEW_PAGE_SIZE = 20  # Rows per page in view_expenses
 
 if not os.path.exists(CSV_FILE):
     with open(CSV_FILE, mode="w", newline="") as file:
         writer = csv.writer(file)
         writer.writerow(["Date", "Category", "Amount"])
 
-def validate_date(date_str):
-    try:
-        datetime.strptime(date_str, '%Y-%m-%d')
-        return True
-    except ValueError:
-        return False
-
-def validate_amount(amount_str):
-    try:
-        amount = float(amount_str)
-        return amount > 0
-    except ValueError:
-        return False
-
 def add_expense():
     while True:
         date = input("Enter the date (YYYY-MM-DD): ")
-        if not validate_date(date):
+        if not ledger.validate_date(date):
             print("❌ Invalid date format. Please use YYYY-MM-DD")
             continue
         break
@@ -38,35 +29,22 @@ def add_expense():
     
     while True:
         amount = input("Enter the amount spent: ")
-        if not validate_amount(amount):
+        if not ledger.validate_amount(amount):
             print("❌ Invalid amount. Please enter a positive number")
             continue
         break
 
-    with open(CSV_FILE, mode="a", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow([date, category, amount])
+    ledger.append_expense(CSV_FILE, [date, category, amount], STORAGE)
 
     print("✅ Expense added successfully!\n")
 
-def view_expenses():
+def view_expenses(start="", end=""):
     try:
-        with open(CSV_FILE, mode="r") as file:
-            reader = csv.reader(file)
-            next(reader)  # Skip header
-            expenses = list(reader)
-
-            if not expenses:
-                print("No expenses recorded yet.")
-                return
-
-            print("\n📌 Your Expenses:")
-            print("-" * 50)
-            print("Date       | Category  | Amount")
-            print("-" * 50)
-            for row in expenses:
-                print(f"{row[0]} | {row[1]:<9} | ${float(row[2]):,.2f}")
-            print("-" * 50)
+        header = "\n".join(["\n📌 Your Expenses:", "-" * 50, "Date       | Category  | Amount", "-" * 50])
+        shown = ledger.browse(CSV_FILE, lambda _, row: f"{row[0]} | {row[1]:<9} | ${float(row[2]):,.2f}",
+                              header, "-" * 50, STORAGE, VIEW_PAGE_SIZE, start, end)
+        if not shown:
+            print("No expenses in that date range." if start or end else "No expenses recorded yet.")
 
     except FileNotFoundError:
         print("No expenses found. Add some first!")
@@ -81,79 +59,96 @@ def delete_expense():
     if choice not in ['1', '2']:
         print("❌ Invalid choice")
         return
-        
-    expenses = []
-    with open(CSV_FILE, mode="r") as file:
-        reader = csv.reader(file)
-        expenses = list(reader)
-    
+
     if choice == '1':
         date = input("Enter date to delete (YYYY-MM-DD): ")
-        expenses = [row for row in expenses if row[0] != date]
+        matches = ledger.find_expenses(CSV_FILE, date=date, storage=STORAGE)
     else:
         category = input("Enter category to delete: ").capitalize()
-        expenses = [row for row in expenses if row[1] != category]
-    
-    with open(CSV_FILE, mode="w", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerows(expenses)
-    
+        matches = ledger.find_expenses(CSV_FILE, category=category, storage=STORAGE)
+
+    if not matches:
+        print("No matching expenses found.")
+        return
+
+    confirm = input(f"Delete {len(matches)} expense(s)? (y/n): ").lower()
+    if confirm != 'y':
+        print("❌ Nothing deleted")
+        return
+
+    ledger.delete_found(CSV_FILE, matches, STORAGE)
     print("✅ Expenses deleted successfully!")
 
-def show_category_totals():
+def show_category_totals(start="", end=""):
     try:
-        with open(CSV_FILE, mode="r") as file:
-            reader = csv.reader(file)
-            next(reader)  # Skip header
-            expenses = list(reader)
+        summary = ledger.summarize_between(CSV_FILE, start, end, STORAGE)
 
-            if not expenses:
+        if not summary.count:
+            if not (start or end):
                 print("No expenses recorded yet.")
-                return
-
-            totals = defaultdict(float)
-            for row in expenses:
-                totals[row[1]] += float(row[2])
+            return
 
-            print("\n📊 Category Totals:")
-            print("-" * 40)
-            for category, total in totals.items():
-                print(f"{category:<15} | ${total:,.2f}")
-            print("-" * 40)
+        print("\n📊 Category Totals:")
+        print("-" * 40)
+        for category, total in summary.by_category.items():
+            print(f"{category:<15} | ${total / 100:,.2f}")
+        print("-" * 40)
 
     except FileNotFoundError:
         print("No expenses found. Add some first!")
 
 def plot_expenses():
     try:
-        with open(CSV_FILE, mode="r") as file:
-            reader = csv.reader(file)
-            next(reader)  # Skip header
-            expenses = list(reader)
+        summary = ledger.summarize(CSV_FILE, STORAGE)
 
-            if not expenses:
-                print("No expenses recorded yet.")
-                return
-
-            totals = defaultdict(float)
-            for row in expenses:
-                totals[row[1]] += float(row[2])
+        if not summary.count:
+            print("No expenses recorded yet.")
+            return
 
-            categories = list(totals.keys())
-            amounts = list(totals.values())
-
-            plt.figure(figsize=(10, 6))
-            plt.bar(categories, amounts)
-            plt.title('Expenses by Category')
-            plt.xlabel('Categories')
-            plt.ylabel('Amount ($)')
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            plt.show()
+        try:
+            import plotting  # Loads matplotlib, so only on demand
+        except ImportError:
+            print("❌ Plotting needs matplotlib: pip install matplotlib")
+            return
+        plotting.plot_category_totals(summary.by_category)
 
     except FileNotFoundError:
         print("No expenses found. Add some first!")
 
+def batch_add_expenses():
+    print("\n📥 Batch Entry: one expense per line as YYYY-MM-DD,Category,Amount")
+    print("Leave the line empty to save them all.")
+    rows = []
+    while True:
+        line = input(f"{len(rows) + 1}> ").strip()
+        if not line:
+            break
+        row = [part.strip() for part in line.split(",")]
+        problem = ledger.check_expense(row)
+        if problem:
+            print(f"❌ Invalid line: {problem}.")
+            continue
+        row[1] = row[1].capitalize()
+        rows.append(row)
+
+    if not rows:
+        print("No expenses entered.")
+        return
+
+    start = time.perf_counter()
+    added = ledger.append_expenses(CSV_FILE, rows, BATCH_FLUSH_SIZE, STORAGE)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"✅ Added {added} expense(s) in {elapsed:.3f}s ({added / elapsed:,.0f} rows/sec)\n")
+
+def view_date_range():
+    start = input("From date (YYYY-MM-DD, empty for the first expense): ").strip()
+    end = input("To date (YYYY-MM-DD, empty for the last expense): ").strip()
+    if any(date and not ledger.validate_date(date) for date in (start, end)):
+        print("❌ Invalid date format. Please use YYYY-MM-DD")
+        return
+    view_expenses(start, end)
+    show_category_totals(start, end)
+
 def main():
     while True:
         print("\n📊 Expense Tracker")
@@ -162,7 +157,9 @@ def main():
         print("3️⃣ Delete Expense")
         print("4️⃣ Show Category Totals")
         print("5️⃣ Plot Expenses")
-        print("6️⃣ Exit")
+        print("6️⃣ Batch Add Expenses")
+        print("7️⃣ View Expenses by Date Range")
+        print("8️⃣ Exit")
 
         choice = input("Choose an option: ")
 
@@ -177,6 +174,10 @@ def main():
         elif choice == "5":
             plot_expenses()
         elif choice == "6":
+            batch_add_expenses()
+        elif choice == "7":
+            view_date_range()
+        elif choice == "8":
             print("Goodbye! 👋")
             break
         else:
@@ -195,14 +196,16 @@ if __name__ == "__main__":
     
     How to use the program:
     
-    1. Run the program and you'll see a menu with 6 options
-    2. Choose an option by entering the corresponding number (1-6):
+    1. Run the program and you'll see a menu with 8 options
+    2. Choose an option by entering the corresponding number (1-8):
        - Option 1: Add a new expense (date, category, amount)
        - Option 2: View all your recorded expenses
        - Option 3: Delete a specific expense
        - Option 4: See total expenses by category
        - Option 5: View a bar chart of your expenses by category
-       - Option 6: Exit the program
+       - Option 6: Add many expenses at once, one per line
+       - Option 7: View expenses and category totals between two dates
+       - Option 8: Exit the program
     
     The program stores expenses in a CSV file and allows you to:
     - Track expenses with dates and categories
@@ -215,4 +218,3 @@ if __name__ == "__main__":
     2. Navigate to the program directory
     3. Run: python proj.py
     """
-    my
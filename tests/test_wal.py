@@ -0,0 +1,108 @@
+"""Crash recovery of the write-ahead log (ledger/wal.py).
+
+Each test leaves a log behind the way a crash would, runs checkpoint()
+and checks that every row whose append() returned is in the CSV file
+exactly once. Rows are told apart by their amount: row n costs n.00.
+
+Run from the repository root:
+
+    pytest tests
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+from collections import Counter
+
+import pytest
+
+from ledger import iter_expenses
+from ledger.wal import FRAME, HEADER, _read_log, checkpoint, pending_expenses, wal_path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Appends rows start..stop-1 one at a time, printing n once row n is
+# acknowledged, then dies without checkpointing, or waits to be killed.
+WRITER = textwrap.dedent("""
+    import os, sys, time
+    from ledger.wal import WriteAheadLog
+
+    path, start, stop, checkpoint_size, linger = sys.argv[1:]
+    log = WriteAheadLog(path, commit_interval=0.001, checkpoint_interval=3600,
+                        checkpoint_size=int(checkpoint_size))
+    for n in range(int(start), int(stop)):
+        log.append([["2024-05-01", "Food", f"{n}.00"]])
+        print(n, flush=True)
+    while linger == "yes":
+        time.sleep(1)
+    os._exit(0)
+""")
+
+@pytest.fixture
+def ledger_path(tmp_path):
+    path = str(tmp_path / "expenses.csv")
+    with open(path, mode="w", newline="") as file:
+        file.write("Date,Category,Amount\n")
+    return path
+
+def _writer(path, start, stop, checkpoint_size=1 << 40, linger=False):
+    return subprocess.Popen(
+        [sys.executable, "-c", WRITER, path, str(start), str(stop), str(checkpoint_size),
+         "yes" if linger else "no"],
+        cwd=ROOT, env=dict(os.environ, PYTHONPATH=ROOT), stdout=subprocess.PIPE, text=True)
+
+def _crash_after_logging(path, start, stop):
+    """Logs rows start..stop-1 in a process that exits without a checkpoint;
+    returns the acknowledged row numbers."""
+    writer = _writer(path, start, stop)
+    acknowledged = [int(line) for line in writer.stdout]
+    assert writer.wait() == 0
+    return acknowledged
+
+def _assert_once(path, acknowledged):
+    assert not pending_expenses(path)
+    counts = Counter(int(float(expense.amount)) for expense in iter_expenses(path))
+    assert all(counts[n] == 1 for n in acknowledged), "an acknowledged row is missing or doubled"
+    assert max(counts.values(), default=0) <= 1, "a row was copied twice"
+
+def test_torn_trailing_frame(ledger_path):
+    acknowledged = _crash_after_logging(ledger_path, 1, 51)
+    # A frame whose write was cut short: its header promises more bytes than follow
+    with open(wal_path(ledger_path), mode="ab") as file:
+        file.write(FRAME.pack(100, 0, 3) + b"2024-05-01,Food,99")
+    assert checkpoint(ledger_path) == len(acknowledged)
+    _assert_once(ledger_path, acknowledged)
+    assert len(list(iter_expenses(ledger_path))) == len(acknowledged)
+
+def test_checkpoint_interrupted_mid_copy(ledger_path):
+    acknowledged = _crash_after_logging(ledger_path, 1, 51)
+    # Do what checkpoint() does up to halfway through the copy, then stop
+    _, payload, _, _ = _read_log(ledger_path)
+    st = os.stat(ledger_path)
+    with open(wal_path(ledger_path), mode="r+b") as file:
+        file.write(HEADER.pack(st.st_ino, st.st_size))
+    with open(ledger_path, mode="ab") as file:
+        file.write(payload[:len(payload) // 2])
+    assert len(pending_expenses(ledger_path)) < len(acknowledged)
+
+    checkpoint(ledger_path)
+    _assert_once(ledger_path, acknowledged)
+    assert len(list(iter_expenses(ledger_path))) == len(acknowledged)
+
+def test_killed_writer(ledger_path):
+    # Small checkpoints, so the kill may land in the middle of one too
+    writer = _writer(ledger_path, 1, 100_000, checkpoint_size=4096, linger=True)
+    acknowledged = []
+    for line in writer.stdout:
+        acknowledged.append(int(line))
+        if len(acknowledged) == 300:
+            break
+    writer.send_signal(signal.SIGKILL)
+    writer.wait()
+    acknowledged.extend(int(line) for line in writer.stdout)
+    writer.stdout.close()
+
+    checkpoint(ledger_path)
+    _assert_once(ledger_path, acknowledged)